@@ -0,0 +1,133 @@
+import sys
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, cast
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from main import db
+from main.models.base import BaseModel
+from main.models.item import ItemModel
+
+if TYPE_CHECKING:
+    from asgiref.typing import HTTPScope
+
+DEFAULT_DATABASE_URI = "sqlite+aiosqlite:///benchmark.db"
+
+
+def report(name: str, seconds_per_op: float):
+    sys.stdout.write(f"{name:<48} {seconds_per_op * 1_000_000:>10.2f} us/op\n")
+
+
+def measure(func: Callable[[], object], number: int) -> float:
+    """Return the average time in seconds of calling ``func``."""
+
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number
+
+
+async def measure_async(func: Callable[[], Awaitable[object]], number: int) -> float:
+    """Return the average time in seconds of awaiting ``func()``."""
+
+    start = time.perf_counter()
+    for _ in range(number):
+        await func()
+    return (time.perf_counter() - start) / number
+
+
+def make_http_scope(
+    method: str,
+    path: str,
+    headers: list | None = None,
+) -> "HTTPScope":
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers
+        or [
+            (b"host", b"test"),
+            (b"user-agent", b"kube-probe/1.22+"),
+        ],
+        "client": ("127.0.0.1", 12345),
+        "server": ("127.0.0.1", 5000),
+    }
+    return cast("HTTPScope", scope)
+
+
+async def call_asgi(
+    app: Callable[..., Awaitable[None]],
+    scope: Mapping[str, Any],
+) -> int:
+    """Send a single bodiless request straight to an ASGI app, return the status."""
+
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(dict(scope), receive, send)
+    return status
+
+
+@asynccontextmanager
+async def benchmark_database(
+    uri: str,
+    recreate: bool = False,
+) -> AsyncIterator[AsyncEngine]:
+    """
+    Create the tables in the database at ``uri`` and bind the sessions to it. With
+    ``recreate``, the existing tables are dropped first, so that the previous runs
+    do not change the results.
+
+    The default database is a local SQLite file, which requires ``aiosqlite``.
+    """
+
+    engine = create_async_engine(uri)
+    async with engine.begin() as conn:
+        if recreate:
+            await conn.run_sync(BaseModel.metadata.drop_all)
+        await conn.run_sync(BaseModel.metadata.create_all)
+
+    db.session_factory.configure(bind=engine)
+    try:
+        async with db.scope():
+            yield engine
+    finally:
+        await engine.dispose()
+
+
+async def seed_items(
+    engine: AsyncEngine,
+    rows: int,
+    make_data: Callable[[int], dict] = lambda _: {},
+    chunk_size: int = 50_000,
+):
+    """Insert items until the item table has ``rows`` rows."""
+
+    async with engine.begin() as conn:
+        existing_rows = (
+            await conn.execute(select(func.count()).select_from(ItemModel))
+        ).scalar_one()
+
+        for start in range(existing_rows, rows, chunk_size):
+            end = min(start + chunk_size, rows)
+            await conn.execute(
+                insert(ItemModel),
+                [{"data": make_data(i)} for i in range(start, end)],
+            )
@@ -0,0 +1,143 @@
+"""
+Compare the per-request cost of rendering an access log line with the original
+dict-based atoms and with the precompiled formatter.
+
+Usage: ENVIRONMENT=test python -m benchmarks.access_log [--number N]
+"""
+
+import argparse
+import http
+import os
+import time
+
+from main.libs.query_stats import QueryStats
+from main.middlewares.access_log import (
+    AccessInfo,
+    AccessLogFormatter,
+    AccessLogMiddleware,
+    get_client_addr,
+    get_path_with_query_string,
+    get_x_forwarded_for,
+)
+
+from ._utils import make_http_scope, measure, report
+
+
+class LegacyAccessLogAtoms(dict):
+    """The atoms implementation used before the format was precompiled."""
+
+    def __init__(self, scope, info):
+        super().__init__()
+
+        for name, value in scope["headers"]:
+            self[f"{{{name.decode('latin1').lower()}}}i"] = value.decode("latin1")
+        for name, value in info["response"].get("headers", []):
+            self[f"{{{name.decode('latin1').lower()}}}o"] = value.decode("latin1")
+        for name, value in os.environ.items():
+            self[f"{{{name.lower()!r}}}e"] = value
+
+        protocol = f"HTTP/{scope['http_version']}"
+
+        status = info["response"]["status"]
+        try:
+            status_phrase = http.HTTPStatus(status).phrase
+        except ValueError:
+            status_phrase = "-"
+
+        path = scope["root_path"] + scope["path"]
+        full_path = get_path_with_query_string(scope)
+        request_line = f"{scope['method']} {path} {protocol}"
+        full_request_line = f"{scope['method']} {full_path} {protocol}"
+
+        request_time = info["end_time"] - info["start_time"]
+        self.update(
+            {
+                "h": scope["client"][0],
+                "client_addr": get_client_addr(scope),
+                "l": "-",
+                "u": "-",
+                "t": time.strftime("[%d/%b/%Y:%H:%M:%S %z]"),
+                "r": request_line,
+                "request_line": full_request_line,
+                "R": full_request_line,
+                "m": scope["method"],
+                "U": scope["path"],
+                "q": scope["query_string"].decode(),
+                "H": protocol,
+                "s": status,
+                "status_code": f"{status} {status_phrase}",
+                "st": status_phrase,
+                "B": self["{Content-Length}o"],
+                "b": self.get("{Content-Length}o", "-"),
+                "f": self["{Referer}i"],
+                "a": self["{User-Agent}i"],
+                "T": int(request_time),
+                "M": int(request_time * 1_000),
+                "D": int(request_time * 1_000_000),
+                "L": request_time,
+                "p": f"<{os.getpid()}>",
+                "x_forwarded_for": get_x_forwarded_for(scope) or "-",
+            },
+        )
+
+    def __getitem__(self, key):
+        try:
+            if key.startswith("{"):
+                return super().__getitem__(key.lower())
+
+            return super().__getitem__(key)
+        except KeyError:
+            return "-"
+
+
+def run(number: int):
+    # The default format before the query atoms were added, which both
+    # implementations support
+    log_format = AccessLogMiddleware.DEFAULT_FORMAT.removesuffix(
+        " %(query_count)d %(query_time).3f",
+    )
+    scope = make_http_scope(
+        "GET",
+        "/items/count",
+        headers=[
+            (b"host", b"items.internal"),
+            (b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64)"),
+            (b"accept", b"application/json"),
+            (b"accept-encoding", b"gzip, deflate"),
+            (b"x-forwarded-for", b"10.0.0.1, 10.0.0.2"),
+            (b"x-request-id", b"6f1c1b0e6b7d4c3f"),
+        ],
+    )
+    now = time.time()
+    info = AccessInfo(
+        response={
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-length", b"11"),
+                (b"content-type", b"application/json"),
+            ],
+            "trailers": False,
+        },
+        start_time=now,
+        end_time=now + 0.002,
+        query_stats=QueryStats(),
+    )
+    formatter = AccessLogFormatter(log_format)
+
+    report(
+        "legacy atoms",
+        measure(lambda: log_format % LegacyAccessLogAtoms(scope, info), number),
+    )
+    report(
+        "precompiled formatter",
+        measure(lambda: log_format % formatter(scope, info), number),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    run(args.number)
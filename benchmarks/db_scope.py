@@ -0,0 +1,36 @@
+"""
+Measure the per-request cost of the DB session scope on the probe endpoints.
+
+Usage: ENVIRONMENT=test python -m benchmarks.db_scope [--requests N]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from main import app, config
+
+from ._utils import call_asgi, make_http_scope, measure_async, report
+
+
+async def run(requests: int):
+    logging.getLogger("http.access").disabled = True
+
+    for path in ("/pings", "/ready"):
+        scope = make_http_scope("GET", path)
+        for lazy in (False, True):
+            config.SQLALCHEMY_LAZY_SESSION = lazy
+
+            # Warm up, so that the middleware stack is built
+            await call_asgi(app, scope)
+
+            result = await measure_async(lambda: call_asgi(app, scope), requests)
+            report(f"GET {path} ({'lazy' if lazy else 'eager'} session)", result)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=10_000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.requests))
@@ -0,0 +1,55 @@
+"""
+Compare counting the items with SELECT count(*) and with the cached count.
+
+The item table is seeded up to each row count, so use a scratch database.
+
+Usage: ENVIRONMENT=test python -m benchmarks.item_count
+    [--database-uri URI] [--rows 1000000 10000000] [--number N]
+"""
+
+import argparse
+import asyncio
+
+from main.engines.items import _query_items_count
+from main.libs.cached_count import CachedCount
+
+from ._utils import (
+    DEFAULT_DATABASE_URI,
+    benchmark_database,
+    measure_async,
+    report,
+    seed_items,
+)
+
+
+async def run(database_uri: str, rows: list[int], number: int):
+    async with benchmark_database(database_uri) as engine:
+        for row_count in rows:
+            await seed_items(engine, row_count)
+
+            report(
+                f"SELECT count(*), {row_count:,} rows",
+                await measure_async(_query_items_count, number),
+            )
+
+            cached_count = CachedCount(_query_items_count, ttl=60)
+            await cached_count.get()
+            report(
+                f"cached count, {row_count:,} rows",
+                await measure_async(cached_count.get, number),
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-uri", default=DEFAULT_DATABASE_URI)
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[1_000_000, 10_000_000],
+    )
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.database_uri, args.rows, args.number))
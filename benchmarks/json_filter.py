@@ -0,0 +1,80 @@
+"""
+Compare filtering the items on keys of their data, scanned from the JSON column and
+read from the indexed generated columns.
+
+The item table is seeded up to each row count, with the data keys, so use a
+scratch database created by this benchmark.
+
+Usage: ENVIRONMENT=test python -m benchmarks.json_filter
+    [--database-uri URI] [--rows 1000000 10000000] [--number N]
+"""
+
+import argparse
+import asyncio
+import functools
+
+from sqlalchemy import Integer, String
+
+from main.engines.items import find_items, item_data
+from main.models.base import json_value
+from main.models.item import ItemModel
+
+from ._utils import (
+    DEFAULT_DATABASE_URI,
+    benchmark_database,
+    measure_async,
+    report,
+    seed_items,
+)
+
+CATEGORIES = 10_000
+
+
+def make_data(index: int) -> dict:
+    return {"category": f"category-{index % CATEGORIES}", "price": index}
+
+
+async def run(database_uri: str, rows: list[int], number: int):
+    async with benchmark_database(database_uri) as engine:
+        for row_count in rows:
+            await seed_items(engine, row_count, make_data)
+
+            # The last prices, so that a scan cannot stop early. Bounded, since a
+            # planner may prefer to scan by ID for an open range.
+            min_price = row_count - 100
+            filters = {
+                "equality": lambda category, _: category == "category-42",
+                "range": lambda _, price: price.between(min_price, row_count),
+            }
+            columns = {
+                "scan": (
+                    json_value(ItemModel.data, "category", String()),
+                    json_value(ItemModel.data, "price", Integer()),
+                ),
+                "indexed": (item_data("category"), item_data("price")),
+            }
+
+            for filter_name, condition in filters.items():
+                for method, (category, price) in columns.items():
+                    report(
+                        f"{filter_name} {method}, {row_count:,} rows",
+                        await measure_async(
+                            functools.partial(find_items, condition(category, price)),
+                            number,
+                        ),
+                    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-uri", default=DEFAULT_DATABASE_URI)
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[1_000_000, 10_000_000],
+    )
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.database_uri, args.rows, args.number))
@@ -0,0 +1,216 @@
+"""
+Load test the service endpoints in process, over ASGI, and compare the results with
+a stored baseline.
+
+Each scenario sends ``--requests`` requests from ``--concurrency`` concurrent
+clients, ``--repeat`` times, and reports the medians of the throughput and the
+p50/p95/p99 latencies. The sessions are bound to ``--database-uri``, and the
+lifespan is not run, so that the configured database is never used. Its tables
+are recreated and seeded on each run, so use a scratch database.
+
+The baseline depends on the machine, so it should be saved on the machine running
+the comparison, e.g. the CI runner, with ``--save-baseline``, and it is not
+committed. The command fails if the throughput or a gated latency of a scenario is
+worse than the baseline by more than ``--threshold``, or if there is no baseline to
+compare with.
+
+Usage: ENVIRONMENT=test python -m benchmarks.load [--database-uri URI]
+    [--concurrency N] [--requests N] [--repeat N] [--scenarios NAME ...]
+    [--baseline PATH] [--save-baseline] [--threshold RATIO]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+from main import app
+
+from ._utils import (
+    DEFAULT_DATABASE_URI,
+    benchmark_database,
+    call_asgi,
+    make_http_scope,
+    seed_items,
+)
+
+# The p99 latency is reported, but too noisy to fail on. So is the p95 latency of
+# the writes, which is bimodal with SQLite, as they wait for its write lock.
+SCENARIOS = {
+    "pings": ("GET", "/pings", ("p50", "p95")),
+    "items_count": ("GET", "/items/count", ("p50", "p95")),
+    "add_item": ("POST", "/items", ("p50",)),
+}
+
+DEFAULT_BASELINE = Path(__file__).parent / "load_baseline.json"
+
+
+@dataclass
+class LoadResult:
+    requests: int
+    errors: int
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+
+    def describe(self) -> str:
+        return (
+            f"{self.throughput:>9.0f} req/s"
+            f" p50 {self.p50 * 1_000:>7.2f} ms"
+            f" p95 {self.p95 * 1_000:>7.2f} ms"
+            f" p99 {self.p99 * 1_000:>7.2f} ms"
+            f" errors {self.errors}"
+        )
+
+    @classmethod
+    def median(cls, results: list["LoadResult"]) -> "LoadResult":
+        """The median of each measure of the ``results`` of repeated runs."""
+
+        return cls(
+            **{
+                field.name: statistics.median_low(
+                    getattr(result, field.name) for result in results
+                )
+                for field in fields(cls)
+            },
+        )
+
+
+async def run_scenario(
+    method: str,
+    path: str,
+    requests: int,
+    concurrency: int,
+) -> LoadResult:
+    scope = make_http_scope(method, path)
+    latencies: list[float] = []
+    errors = 0
+    # Shared by the clients, so that they send ``requests`` requests in total
+    pending_requests = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for _ in pending_requests:
+            start_time = time.perf_counter()
+            status = await call_asgi(app, scope)
+            latencies.append(time.perf_counter() - start_time)
+            if status >= 400:
+                errors += 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    duration = time.perf_counter() - start_time
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return LoadResult(
+        requests=requests,
+        errors=errors,
+        throughput=requests / duration,
+        p50=percentiles[49],
+        p95=percentiles[94],
+        p99=percentiles[98],
+    )
+
+
+def find_regressions(
+    results: dict[str, LoadResult],
+    baseline: dict[str, dict],
+    threshold: float,
+) -> list[str]:
+    regressions = []
+
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+
+        if result.throughput < expected["throughput"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {result.throughput:.0f} req/s,"
+                f" baseline {expected['throughput']:.0f} req/s",
+            )
+
+        _, _, gated_latencies = SCENARIOS[name]
+        for latency in gated_latencies:
+            value, expected_value = getattr(result, latency), expected[latency]
+            if value > expected_value * (1 + threshold):
+                regressions.append(
+                    f"{name}: {latency} {value * 1_000:.2f} ms,"
+                    f" baseline {expected_value * 1_000:.2f} ms",
+                )
+
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> int:
+    logging.getLogger("http.access").disabled = True
+
+    results = {}
+    async with benchmark_database(args.database_uri, recreate=True) as engine:
+        await seed_items(engine, args.rows)
+
+        for name in args.scenarios:
+            method, path, _ = SCENARIOS[name]
+
+            # Warm up, so that the middleware stack is built and the pool is filled
+            await run_scenario(method, path, args.concurrency, args.concurrency)
+
+            result = LoadResult.median(
+                [
+                    await run_scenario(method, path, args.requests, args.concurrency)
+                    for _ in range(args.repeat)
+                ],
+            )
+            results[name] = result
+            sys.stdout.write(f"{f'{method} {path}':<24} {result.describe()}\n")
+
+    if args.save_baseline:
+        args.baseline.write_text(
+            json.dumps({name: asdict(r) for name, r in results.items()}, indent=2)
+            + "\n",
+        )
+        sys.stdout.write(f"Saved the baseline to {args.baseline}\n")
+        return 0
+
+    if not args.baseline.exists():
+        sys.stdout.write(
+            f"No baseline at {args.baseline}, save one with --save-baseline\n",
+        )
+        return 1
+
+    regressions = find_regressions(
+        results,
+        json.loads(args.baseline.read_text()),
+        args.threshold,
+    )
+    for regression in regressions:
+        sys.stdout.write(f"Regression: {regression}\n")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-uri", default=DEFAULT_DATABASE_URI)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=list(SCENARIOS),
+        default=list(SCENARIOS),
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(run(args)))
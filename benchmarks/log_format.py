@@ -0,0 +1,81 @@
+"""
+Compare the throughput of the log formatters.
+
+Usage: ENVIRONMENT=test python -m benchmarks.log_format [--number N]
+"""
+
+import argparse
+import json
+import logging
+
+from main.libs import serialization
+from main.libs.log import JSONFormatter, TextFormatter
+
+from ._utils import measure, report
+
+TEXT_FORMAT = (
+    "[%(asctime)s][%(name)s][%(levelname)s]"
+    " (%(module)s:%(funcName)s:%(lineno)d) %(message)s"
+)
+
+DATA = {
+    "error_code": 400001,
+    "error_data": [
+        {"loc": ["body", "items", 0, "data"], "msg": "Field required"},
+        {"loc": ["body", "items", 3, "data"], "msg": "Input should be a dict"},
+    ],
+    "item_ids": list(range(20)),
+}
+
+
+def make_record() -> logging.LogRecord:
+    return logging.makeLogRecord(
+        {
+            "name": "main.commons.error_handlers",
+            "levelno": logging.WARNING,
+            "levelname": "WARNING",
+            "pathname": __file__,
+            "lineno": 42,
+            "msg": "Validation error for %s",
+            "args": ("POST /items/batch",),
+            "data": DATA,
+        },
+    )
+
+
+def format_legacy(formatter: logging.Formatter, record: logging.LogRecord) -> str:
+    """The formatting done before records carried their data payload."""
+    record.msg = f"Validation error for %s | {json.dumps(DATA, default=str)}"
+    return formatter.format(record)
+
+
+def run(number: int):
+    record = make_record()
+
+    legacy_formatter = logging.Formatter(TEXT_FORMAT)
+    report(
+        "legacy text formatter",
+        measure(lambda: format_legacy(legacy_formatter, record), number),
+    )
+
+    text_formatter = TextFormatter(TEXT_FORMAT)
+    report("text formatter", measure(lambda: text_formatter.format(record), number))
+
+    encoders = {"stdlib": serialization.stdlib_dumps}
+    if serialization.orjson is not None:
+        encoders["orjson"] = serialization.orjson_dumps
+
+    for name, encoder in encoders.items():
+        json_formatter = JSONFormatter(encoder)
+        report(
+            f"json formatter ({name})",
+            measure(lambda: json_formatter.format(record), number),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    run(args.number)
@@ -0,0 +1,81 @@
+"""
+Compare the per-request overhead of nested middlewares, each wrapping ``send``,
+with a single pipeline running the same number of hooks.
+
+Usage: ENVIRONMENT=test python -m benchmarks.middleware_pipeline [--requests N]
+"""
+
+import argparse
+import asyncio
+
+from main.middlewares import MiddlewarePipeline, PipelineHook
+
+from ._utils import call_asgi, make_http_scope, measure_async, report
+
+HOOK_COUNTS = (1, 2, 4, 8)
+
+
+async def app(_, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+class NestedMiddleware:
+    """A middleware doing as little as a hook, in a middleware of its own."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        status = None
+
+        async def wrapped_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, wrapped_send)
+        finally:
+            scope["status"] = status
+
+
+class Hook(PipelineHook):
+    def on_response_start(self, context, message):
+        context.state["status"] = message["status"]
+
+    async def on_finish(self, context):
+        context.scope["status"] = context.state.get("status")
+
+
+async def run(requests: int):
+    scope = make_http_scope("GET", "/")
+
+    for count in HOOK_COUNTS:
+        nested = app
+        for _ in range(count):
+            nested = NestedMiddleware(nested)
+        pipeline = MiddlewarePipeline(app, [Hook() for _ in range(count)])
+
+        # Warm up
+        await call_asgi(nested, scope)
+        await call_asgi(pipeline, scope)
+
+        report(
+            f"{count} nested middlewares",
+            await measure_async(lambda: call_asgi(nested, scope), requests),
+        )
+        report(
+            f"pipeline of {count} hooks",
+            await measure_async(lambda: call_asgi(pipeline, scope), requests),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50_000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.requests))
@@ -0,0 +1,93 @@
+"""
+Compare the cost of serializing a page of items and an error response, through
+the default FastAPI path and through the fast JSON response.
+
+Usage: ENVIRONMENT=test python -m benchmarks.serialization [--number N] [--items N]
+"""
+
+import argparse
+import random
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from main.commons.exceptions import ValidationError
+from main.commons.responses import FastJSONResponse
+from main.schemas.exceptions import ErrorSchema
+from main.schemas.item import ItemListSchema, ItemSchema
+
+from ._utils import measure, report
+
+
+def make_data(i: int) -> dict:
+    """An item payload, with the nesting and value types of real item data."""
+
+    rng = random.Random(i)
+    return {
+        "name": f"item-{i}",
+        "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit.",
+        "price": round(rng.uniform(1, 1_000), 2),
+        "quantity": rng.randint(0, 500),
+        "active": rng.random() < 0.9,
+        "tags": rng.sample(["new", "sale", "popular", "limited", "eco"], 3),
+        "attributes": {
+            "color": rng.choice(["red", "green", "blue"]),
+            "size": rng.choice(["S", "M", "L", "XL"]),
+            "weight": rng.uniform(0.1, 20),
+        },
+        "variants": [
+            {"sku": f"SKU-{i}-{j}", "stock": rng.randint(0, 50)} for j in range(3)
+        ],
+        "created_at": "2023-09-01T12:34:56.789000+00:00",
+    }
+
+
+def render_default(items: list[ItemSchema]) -> bytes:
+    """What FastAPI does with a returned dict of schemas."""
+
+    content = {"items": items, "next_cursor": None}
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def render_fast(items: list[ItemSchema]) -> bytes:
+    return FastJSONResponse(ItemListSchema(items=items, next_cursor=None)).body
+
+
+def render_error_legacy(error: ValidationError) -> bytes:
+    """The error rendering done before the fast JSON response."""
+
+    return JSONResponse(ErrorSchema.model_validate(error).model_dump(mode="json")).body
+
+
+def run(number: int, items_per_page: int):
+    items = [ItemSchema(id=i, data=make_data(i)) for i in range(items_per_page)]
+
+    report(
+        f"{items_per_page} items, jsonable_encoder + json",
+        measure(lambda: render_default(items), number),
+    )
+    report(
+        f"{items_per_page} items, fast JSON response",
+        measure(lambda: render_fast(items), number),
+    )
+
+    error = ValidationError(
+        error_data=[
+            {"type": "missing", "loc": ["body", i, "data"], "msg": "Field required"}
+            for i in range(5)
+        ],
+    )
+    report(
+        "error, validate + dump + json",
+        measure(lambda: render_error_legacy(error), number),
+    )
+    report("error, fast JSON response", measure(lambda: error.to_response(), number))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=2_000)
+    parser.add_argument("--items", type=int, default=100)
+    args = parser.parse_args()
+
+    run(args.number, args.items)
@@ -3,6 +3,8 @@ from importlib import import_module
 from ._app import app
 from ._config import config
 from ._db import db
+from ._health import health_monitor
+from ._tasks import task_queue
 from .commons.error_handlers import register_error_handlers
 
 
@@ -0,0 +1,35 @@
+import argparse
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m main")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("serve", help="Run the production server.")
+
+    profile_parser = subparsers.add_parser(
+        "profile-startup",
+        help="Report the startup phases and the slowest imports.",
+    )
+    profile_parser.add_argument("--top", type=int, default=20)
+    profile_parser.add_argument(
+        "--lifespan",
+        action="store_true",
+        help="Also run the lifespan, which connects to the database.",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        from main.server import serve
+
+        serve()
+    elif args.command == "profile-startup":
+        from main.profiling import format_profile, profile_startup
+
+        profile = profile_startup(lifespan=args.lifespan)
+        sys.stdout.write(format_profile(profile, args.top))
+
+
+if __name__ == "__main__":
+    main()
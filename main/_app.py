@@ -1,26 +1,83 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
 
 from ._config import config
+from .commons.responses import FastJSONResponse
 from .middlewares import (
-    AccessLogMiddleware,
-    DBSessionMiddleware,
+    AccessLogHook,
+    AdmissionControlHook,
+    CORSHook,
+    DBSessionHook,
+    MetricsHook,
+    MiddlewarePipeline,
 )
 
 api_docs_enabled = config.ENVIRONMENT == "local"
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    from main import db, health_monitor, task_queue
+    from main.engines.items import items_write_buffer
+    from main.libs.log import get_logger, shutdown_logging
+
+    logger = get_logger(__name__)
+
+    if config.SQLALCHEMY_POOL_WARM_UP:
+        try:
+            await db.warm_up()
+        except Exception as e:
+            logger.warning("Database pool warm-up failed", data={"error": e})
+
+    if health_monitor.enabled:
+        await health_monitor.update()
+    health_monitor.start()
+    task_queue.start()
+
+    yield
+
+    await health_monitor.stop()
+
+    # The tasks may still write, so they are drained before the database closes
+    await task_queue.close(config.TASKS_SHUTDOWN_TIMEOUT)
+
+    await items_write_buffer.close()
+    await db.dispose()
+    shutdown_logging()
+
+
 app = FastAPI(
     redoc_url=None,
     docs_url="/docs" if api_docs_enabled else None,
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
+# The middlewares run as hooks of a single pipeline, the first one being the
+# outermost. CORS and the admission control come before the DB scope, which
+# preflight and rejected requests skip.
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    MiddlewarePipeline,
+    hooks=[
+        AccessLogHook(),
+        MetricsHook(),
+        CORSHook(
+            allow_origins=["*"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        ),
+        AdmissionControlHook(
+            max_in_flight=config.ADMISSION_MAX_IN_FLIGHT,
+            path_limits=config.ADMISSION_PATH_LIMITS,
+            queue_size=config.ADMISSION_QUEUE_SIZE,
+            queue_timeout=config.ADMISSION_QUEUE_TIMEOUT,
+            max_pending_pool_checkouts=config.ADMISSION_MAX_PENDING_POOL_CHECKOUTS,
+            max_latency=config.ADMISSION_MAX_LATENCY,
+            retry_after=config.ADMISSION_RETRY_AFTER,
+            exempt_paths=config.ADMISSION_EXEMPT_PATHS,
+        ),
+        DBSessionHook(),
+    ],
 )
-
-app.add_middleware(DBSessionMiddleware)
-app.add_middleware(AccessLogMiddleware)
@@ -3,14 +3,118 @@ import os
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from .enums import LogFormat, LogQueueFullPolicy, ReplicaStrategy
+
 
 class Config(BaseSettings):
     ENVIRONMENT: str
     LOGGING_LEVEL: int = logging.INFO
+    LOGGING_FORMAT: LogFormat = LogFormat.TEXT
+    # Write logs from a background thread instead of the event loop
+    LOGGING_QUEUE_ENABLED: bool = False
+    LOGGING_QUEUE_SIZE: int = 10_000
+    LOGGING_QUEUE_BATCH_SIZE: int = 100
+    LOGGING_QUEUE_FULL_POLICY: LogQueueFullPolicy = LogQueueFullPolicy.DROP
+
+    # Production server, see main.server
+    # All the interfaces, for containers
+    SERVER_HOST: str = "0.0.0.0"  # noqa: S104
+    SERVER_PORT: int = 5000
+    # Number of worker processes, the number of CPUs by default
+    SERVER_WORKERS: int | None = None
+    SERVER_BACKLOG: int = 2048
+    # Seconds to keep idle connections open
+    SERVER_KEEP_ALIVE_TIMEOUT: int = 5
+    # Maximum number of concurrent connections and tasks per worker, above which
+    # requests are answered with 503
+    SERVER_LIMIT_CONCURRENCY: int | None = None
+    # Recycle a worker after this many requests, plus a random jitter so that the
+    # workers do not restart at the same time, to bound memory growth
+    SERVER_MAX_REQUESTS: int | None = None
+    SERVER_MAX_REQUESTS_JITTER: int = 0
+    # Stop the server once a worker crashed this many times in a row, e.g. when it
+    # fails to start, rather than restarting it forever
+    SERVER_WORKER_MAX_RESTARTS: int = 5
+    # Seconds to wait for the ongoing requests when a worker shuts down
+    SERVER_GRACEFUL_SHUTDOWN_TIMEOUT: int = 30
+
+    # Admission control: requests above the limits wait in a bounded queue, and are
+    # rejected with 503 once it is full or they waited too long
+    ADMISSION_MAX_IN_FLIGHT: int | None = None
+    # Maximum number of in-flight requests per path, e.g. {"/items/batch": 4}
+    ADMISSION_PATH_LIMITS: dict[str, int] = {}
+    ADMISSION_QUEUE_SIZE: int = 100
+    ADMISSION_QUEUE_TIMEOUT: float = 0.5
+    # Shed the requests while this many DB pool checkouts are waiting, or while the
+    # average seconds until the requests start responding are above the maximum
+    ADMISSION_MAX_PENDING_POOL_CHECKOUTS: int | None = None
+    ADMISSION_MAX_LATENCY: float | None = None
+    # Seconds the rejected clients are asked to wait before retrying
+    ADMISSION_RETRY_AFTER: int = 1
+    # The probes are never rejected
+    ADMISSION_EXEMPT_PATHS: list[str] = ["/pings", "/ready", "/metrics"]
+
+    # Background tasks, run off the request path by `task_queue`
+    TASKS_CONCURRENCY: int = 4
+    # Enqueuing fails beyond this many tasks waiting for a worker
+    TASKS_MAX_QUEUE_SIZE: int = 1_000
+    # Failing tasks are retried after TASKS_RETRY_BACKOFF seconds, doubling
+    TASKS_MAX_RETRIES: int = 3
+    TASKS_RETRY_BACKOFF: float = 0.5
+    # Seconds to wait for the queued tasks on shutdown
+    TASKS_SHUTDOWN_TIMEOUT: float = 10
 
     SQLALCHEMY_DATABASE_URI: str
     SQLALCHEMY_ENGINE_OPTIONS: dict = {}
     SQLALCHEMY_ECHO: bool = False
+    # Pool settings, only used by queue pools (MySQL)
+    SQLALCHEMY_POOL_SIZE: int = 5
+    SQLALCHEMY_MAX_OVERFLOW: int = 10
+    # Seconds after which connections are replaced, -1 to disable
+    SQLALCHEMY_POOL_RECYCLE: int = 3600
+    # Seconds to wait for a connection when the pool is exhausted
+    SQLALCHEMY_POOL_TIMEOUT: float = 30
+    # Prefer the background health check, pre-ping costs a round trip per checkout
+    SQLALCHEMY_POOL_PRE_PING: bool = False
+    # Open the pool connections on startup, before serving requests
+    SQLALCHEMY_POOL_WARM_UP: bool = True
+    # Reads are sent to these replicas, if any, and writes to the primary
+    SQLALCHEMY_REPLICA_URIS: list[str] = []
+    SQLALCHEMY_REPLICA_STRATEGY: ReplicaStrategy = ReplicaStrategy.ROUND_ROBIN
+    # Only create the request session on first use of `db.session`
+    SQLALCHEMY_LAZY_SESSION: bool = True
+    # Queries taking at least this many seconds are logged, None to disable
+    SQLALCHEMY_SLOW_QUERY_THRESHOLD: float | None = 1.0
+    # Seconds after which the statements of a request are cancelled, which routes
+    # can shorten with `db.deadline`. MySQL SELECTs are also limited on the server.
+    SQLALCHEMY_REQUEST_DEADLINE: float | None = None
+    # Cancel the statements of a request when its client disconnects
+    SQLALCHEMY_CANCEL_ON_DISCONNECT: bool = True
+
+    # Seconds between background health checks, which also check the pool
+    # connections, 0 to disable them and always report the service as healthy
+    HEALTH_CHECK_INTERVAL: float = 10
+    HEALTH_CHECK_TIMEOUT: float = 5
+    # Report the service as overloaded above this share of checked out connections
+    HEALTH_POOL_SATURATION_THRESHOLD: float = 0.9
+
+    # Maximum number of GET responses kept in the in-process response cache
+    RESPONSE_CACHE_MAX_SIZE: int = 1_024
+
+    # Seconds the item GET responses are cached for, 0 to only send ETags. Writes
+    # invalidate the cache of the process only, so this bounds the staleness
+    ITEMS_RESPONSE_CACHE_TTL: float = 0
+    # Maximum staleness in seconds of the cached item count, 0 to disable the cache
+    ITEMS_COUNT_CACHE_TTL: float = 0
+    # Number of rows per multi-row INSERT when adding items in bulk
+    ITEMS_BATCH_CHUNK_SIZE: int = 1_000
+    # Number of rows fetched at once when exporting items
+    ITEMS_EXPORT_CHUNK_SIZE: int = 1_000
+    # Coalesce concurrent single-item inserts into multi-row inserts, flushed
+    # every MAX_SIZE items or MAX_DELAY seconds, whichever comes first
+    ITEMS_WRITE_BEHIND_ENABLED: bool = False
+    ITEMS_WRITE_BEHIND_MAX_SIZE: int = 100
+    ITEMS_WRITE_BEHIND_MAX_DELAY: float = 0.005
 
     model_config = SettingsConfigDict(
         case_sensitive=True,
@@ -1,25 +1,173 @@
+import asyncio
+import functools
+import itertools
 import secrets
+import time
+from collections.abc import Callable, Coroutine
 from contextlib import asynccontextmanager
-from contextvars import ContextVar
-from typing import ParamSpec, TypeVar
+from contextvars import ContextVar, Token
+from functools import cached_property
+from typing import Any, ParamSpec, TypeVar
 
+from sqlalchemy import Select, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.engine.default import DefaultDialect
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_scoped_session,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
 
 from ._config import config
+from .enums import HealthStatus, ReplicaStrategy
+from .libs.deadline import Deadline, deadline_context, limit_execution_time
+from .libs.log import get_logger
+from .libs.metrics import Histogram, metrics
+from .libs.query_stats import instrument_engine
 
 T = TypeVar("T")
 P = ParamSpec("P")
 
+logger = get_logger(__name__)
+
+ScopeToken = tuple[Token[str], Token[Deadline | None]]
+
 
 def generate_request_id() -> str:
     return secrets.token_hex()
 
 
+class ReplicaSelector:
+    """Choose the replica engine of a new session."""
+
+    def __init__(self, engines: list[Engine], strategy: ReplicaStrategy):
+        self.engines = engines
+        self.strategy = strategy
+        self._round_robin = itertools.cycle(engines)
+
+    def __call__(self) -> Engine:
+        if self.strategy == ReplicaStrategy.LEAST_CONNECTIONS:
+            return min(self.engines, key=_count_checked_out_connections)
+
+        return next(self._round_robin)
+
+
+def _count_checked_out_connections(engine: Engine) -> int:
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return checkedout() if checkedout is not None else 0
+
+
+class RoutingSession(Session):
+    """
+    Route the reads of a session to a replica, and its writes to the primary.
+
+    A session sticks to a single replica, so that its reads are consistent. Once
+    the session writes or flushes, all its statements go to the primary, so that
+    it reads its own writes. This can also be forced with ``Database.use_primary``.
+    """
+
+    USE_PRIMARY = "use_primary"
+    REPLICA = "replica"
+
+    def __init__(
+        self,
+        *args,
+        primary: Engine,
+        replica_selector: ReplicaSelector,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.primary = primary
+        self.replica_selector = replica_selector
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.info.get(self.USE_PRIMARY) or self._flushing or not _is_read(clause):
+            self.info[self.USE_PRIMARY] = True
+            return self.primary
+
+        replica = self.info.get(self.REPLICA)
+        if replica is None:
+            replica = self.info[self.REPLICA] = self.replica_selector()
+
+        return replica
+
+
+def _is_read(clause) -> bool:
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+def _with_deadline(
+    method: Callable[P, Coroutine[Any, Any, T]],
+) -> Callable[P, Coroutine[Any, Any, T]]:
+    @functools.wraps(method)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        deadline = deadline_context.get()
+        if deadline is None:
+            return await method(*args, **kwargs)
+
+        async with deadline.enforce():
+            return await method(*args, **kwargs)
+
+    return wrapper
+
+
+class DeadlineSession(AsyncSession):
+    """
+    Run the statements of the session within the deadline of the current scope.
+
+    A cancelled statement invalidates its connection, which is closed rather than
+    returned to the pool, since the server may still be running the statement.
+    Only the initial execution of ``stream`` is covered, not the fetches.
+    """
+
+    # The wrappers keep the signatures, but not the overloads
+    execute = _with_deadline(AsyncSession.execute)  # type: ignore[assignment]
+    scalar = _with_deadline(AsyncSession.scalar)  # type: ignore[assignment]
+    get = _with_deadline(AsyncSession.get)
+    stream = _with_deadline(AsyncSession.stream)  # type: ignore[assignment]
+    refresh = _with_deadline(AsyncSession.refresh)
+    flush = _with_deadline(AsyncSession.flush)
+    commit = _with_deadline(AsyncSession.commit)
+
+
+def get_engine_options(uri: str) -> dict:
+    """
+    Build the engine options from the typed pool settings of the config, which can
+    be overridden by ``SQLALCHEMY_ENGINE_OPTIONS``.
+
+    The pool sizing options only apply to queue pools, the default for MySQL.
+    """
+
+    options: dict = {
+        "echo": config.SQLALCHEMY_ECHO,
+        "pool_pre_ping": config.SQLALCHEMY_POOL_PRE_PING,
+    }
+
+    url = make_url(uri)
+    dialect = url.get_dialect()
+    poolclass = config.SQLALCHEMY_ENGINE_OPTIONS.get(
+        "poolclass",
+        (
+            dialect.get_pool_class(url)
+            if issubclass(dialect, DefaultDialect)
+            else QueuePool
+        ),
+    )
+    if issubclass(poolclass, QueuePool):
+        options.update(
+            pool_size=config.SQLALCHEMY_POOL_SIZE,
+            max_overflow=config.SQLALCHEMY_MAX_OVERFLOW,
+            pool_recycle=config.SQLALCHEMY_POOL_RECYCLE,
+            pool_timeout=config.SQLALCHEMY_POOL_TIMEOUT,
+        )
+
+    return {**options, **config.SQLALCHEMY_ENGINE_OPTIONS}
+
+
 class Database:
     """
     Set up and contain our database connections.
@@ -42,26 +190,162 @@ class Database:
             default="",
         )
 
-        self.engine = create_async_engine(
-            config.SQLALCHEMY_DATABASE_URI,
-            echo=config.SQLALCHEMY_ECHO,
-            pool_pre_ping=True,
-            **config.SQLALCHEMY_ENGINE_OPTIONS,
-        )
+        self._pool_checkout_duration = self._register_pool_metrics()
+        # Number of checkouts of the primary pool in progress, most of them waiting
+        # for a connection when the pool is exhausted
+        self.pending_pool_checkouts = 0
+
+    # The engines and sessions are created on first use rather than on import, so
+    # that starting the application does not pay for them until it needs them
 
-        self.session_factory = async_sessionmaker(
+    @cached_property
+    def engine(self) -> AsyncEngine:
+        engine = self._create_engine(config.SQLALCHEMY_DATABASE_URI)
+        self._time_pool_checkouts(engine)
+        return engine
+
+    @cached_property
+    def replica_engines(self) -> list[AsyncEngine]:
+        return [self._create_engine(uri) for uri in config.SQLALCHEMY_REPLICA_URIS]
+
+    @cached_property
+    def session_factory(self) -> async_sessionmaker[AsyncSession]:
+        routing_options: dict[str, Any] = {}
+        if self.replica_engines:
+            routing_options = {
+                "sync_session_class": RoutingSession,
+                "primary": self.engine.sync_engine,
+                "replica_selector": ReplicaSelector(
+                    [engine.sync_engine for engine in self.replica_engines],
+                    config.SQLALCHEMY_REPLICA_STRATEGY,
+                ),
+            }
+
+        return async_sessionmaker(
             bind=self.engine,
-            class_=AsyncSession,
+            class_=DeadlineSession,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
+            **routing_options,
         )
 
-        self.scoped_session = async_scoped_session(
-            self.session_factory,
-            self._scope_func,
+    @cached_property
+    def scoped_session(self) -> async_scoped_session[AsyncSession]:
+        return async_scoped_session(self.session_factory, self._scope_func)
+
+    @staticmethod
+    def _create_engine(uri: str) -> AsyncEngine:
+        engine = create_async_engine(uri, **get_engine_options(uri))
+        instrument_engine(engine.sync_engine)
+        if engine.dialect.name == "mysql":
+            limit_execution_time(engine.sync_engine)
+        return engine
+
+    def _register_pool_metrics(self) -> Histogram:
+        def pool_stat(name: str) -> Callable[[], float | None]:
+            # Only queue pools (the default for MySQL) keep these statistics
+            def callback() -> float | None:
+                engine = self.__dict__.get("engine")
+                stat = getattr(engine.pool, name, None) if engine else None
+                return stat() if stat is not None else None
+
+            return callback
+
+        for name, documentation in (
+            ("size", "Number of connections the pool keeps open."),
+            ("checkedout", "Number of connections checked out of the pool."),
+            ("checkedin", "Number of idle connections in the pool."),
+            ("overflow", "Number of overflow connections opened by the pool."),
+        ):
+            metrics.gauge(f"db_pool_{name}", documentation, pool_stat(name))
+
+        return metrics.histogram(
+            "db_pool_checkout_duration_seconds",
+            "Time spent waiting to check a connection out of the pool.",
         )
 
+    def _time_pool_checkouts(self, engine: AsyncEngine):
+        # The pool has no event before a checkout, so the connections are timed
+        # where the engine checks them out. Unlike the pool, the engine is not
+        # replaced by dispose.
+        sync_engine = engine.sync_engine
+        raw_connection = sync_engine.raw_connection
+
+        def timed_raw_connection():
+            start_time = time.perf_counter()
+            self.pending_pool_checkouts += 1
+            try:
+                return raw_connection()
+            finally:
+                self.pending_pool_checkouts -= 1
+                self._pool_checkout_duration.observe(time.perf_counter() - start_time)
+
+        sync_engine.raw_connection = timed_raw_connection  # type: ignore[method-assign]
+
+    @property
+    def engines(self) -> list[AsyncEngine]:
+        return [self.engine, *self.replica_engines]
+
+    async def dispose(self):
+        """Close the connections of the pools, if the engines were created."""
+
+        engines = [
+            self.__dict__.get("engine"),
+            *self.__dict__.get("replica_engines", []),
+        ]
+        await asyncio.gather(
+            *(engine.dispose() for engine in engines if engine is not None),
+        )
+
+    async def warm_up(self):
+        """Open the connections of the pools, up to their size."""
+
+        async def warm_up_engine(engine: AsyncEngine):
+            pool_size = getattr(engine.pool, "size", None)
+            connections = await asyncio.gather(
+                *(engine.connect() for _ in range(pool_size() if pool_size else 1)),
+            )
+            for connection in connections:
+                await connection.close()
+
+        await asyncio.gather(*map(warm_up_engine, self.engines))
+
+    async def check_connections(self):
+        """
+        Run a trivial query on every engine.
+
+        If the connection turns out to be dead, SQLAlchemy invalidates the whole
+        pool, so that stale connections are replaced on their next checkout. Run
+        periodically, this replaces ``pool_pre_ping``, which costs a round trip on
+        every checkout.
+        """
+
+        async def check_engine(engine: AsyncEngine):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+
+        await asyncio.gather(*map(check_engine, self.engines))
+
+    def get_pool_saturation(self) -> float:
+        """Share of the primary pool capacity which is checked out, from 0 to 1."""
+
+        pool = self.engine.pool
+        if not isinstance(pool, QueuePool):
+            return 0
+
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        return pool.checkedout() / capacity if capacity else 0
+
+    async def get_health(self) -> HealthStatus:
+        # The check takes a connection from the pool, so a saturated pool would
+        # make it time out
+        if self.get_pool_saturation() >= config.HEALTH_POOL_SATURATION_THRESHOLD:
+            return HealthStatus.OVERLOADED
+
+        await self.check_connections()
+        return HealthStatus.HEALTHY
+
     def _scope_func(self) -> str:
         return self.request_id_context.get()
 
@@ -69,25 +353,118 @@ class Database:
     def session(self) -> AsyncSession:
         return self.scoped_session()
 
+    def use_primary(self):
+        """
+        Send all the following statements of the current scope to the primary,
+        e.g. to read data written by another scope. No-op without replicas.
+        """
+        self.session.info[RoutingSession.USE_PRIMARY] = True
+
+    @property
+    def uses_primary(self) -> bool:
+        """
+        Whether the current scope sends its reads to the primary, after
+        ``use_primary`` or a write. Does not create the session of a lazy scope.
+        """
+
+        scoped_session = self.__dict__.get("scoped_session")
+        if scoped_session is None or not scoped_session.registry.has():
+            return False
+
+        return bool(self.session.info.get(RoutingSession.USE_PRIMARY))
+
+    @property
+    def in_transaction(self) -> bool:
+        """
+        Whether the session of the current scope has an open transaction, e.g.
+        after a read or a flush, or changes to flush. Does not create the session
+        of a lazy scope.
+        """
+
+        scoped_session = self.__dict__.get("scoped_session")
+        if scoped_session is None or not scoped_session.registry.has():
+            return False
+
+        session = self.session
+        return session.in_transaction() or bool(
+            session.new or session.dirty or session.deleted,
+        )
+
     @asynccontextmanager
-    async def scope(self):
+    async def scope(self, lazy: bool = False, timeout: float | None = None):
         """
         Create a new database session (scope).
 
         This creates a new database session to handle all the database connection
         from a single scope (request). This method should typically only been called
         in request middleware.
-        """
 
-        token = self.request_id_context.set(generate_request_id())
-        self.scoped_session()
+        With ``lazy=True``, the session is only created the first time ``session``
+        is accessed inside the scope, and the teardown is skipped entirely if the
+        scope never touched the database.
 
+        With a ``timeout``, the statements of the scope are cancelled once it
+        expires, and raise ``DeadlineExceeded``.
+        """
+
+        token = self.enter_scope(
+            lazy,
+            Deadline(timeout) if timeout is not None else None,
+        )
         try:
             yield
 
         finally:
-            await self.scoped_session.remove()
-            self.request_id_context.reset(token)
+            await self.exit_scope(token)
+
+    def enter_scope(
+        self,
+        lazy: bool = False,
+        deadline: Deadline | None = None,
+    ) -> ScopeToken:
+        """
+        Start a scope, like ``scope``, which must be ended with ``exit_scope``. The
+        scope does not inherit the deadline of the current one.
+        """
+
+        token = (
+            self.request_id_context.set(generate_request_id()),
+            deadline_context.set(deadline),
+        )
+        if not lazy:
+            self.scoped_session()
+
+        return token
+
+    async def exit_scope(self, token: ScopeToken):
+        request_id_token, deadline_token = token
+
+        # Lazy scopes of a process which never used the database have no session
+        scoped_session = self.__dict__.get("scoped_session")
+        if scoped_session is not None and scoped_session.registry.has():
+            await scoped_session.remove()
+        deadline_context.reset(deadline_token)
+        self.request_id_context.reset(request_id_token)
+
+    @asynccontextmanager
+    async def deadline(self, timeout: float):
+        """
+        Cancel the statements of the block after ``timeout`` seconds, or earlier
+        if the deadline of the scope expires first. It can also decorate an async
+        function, e.g. an endpoint, to set the deadline of a route.
+        """
+
+        deadline = deadline_context.get()
+        if deadline is not None:
+            with deadline.shorten(timeout):
+                yield
+            return
+
+        token = deadline_context.set(Deadline(timeout))
+        try:
+            yield
+        finally:
+            deadline_context.reset(token)
 
 
 db = Database()
@@ -0,0 +1,9 @@
+from ._config import config
+from ._db import db
+from .libs.health import HealthMonitor
+
+health_monitor = HealthMonitor(
+    db.get_health,
+    interval=config.HEALTH_CHECK_INTERVAL,
+    timeout=config.HEALTH_CHECK_TIMEOUT,
+)
@@ -0,0 +1,18 @@
+from ._config import config
+from ._db import db
+from .libs.metrics import metrics
+from .libs.tasks import TaskQueue
+
+task_queue = TaskQueue(
+    concurrency=config.TASKS_CONCURRENCY,
+    max_size=config.TASKS_MAX_QUEUE_SIZE,
+    max_retries=config.TASKS_MAX_RETRIES,
+    retry_backoff=config.TASKS_RETRY_BACKOFF,
+    scope=lambda: db.scope(lazy=True),
+)
+
+metrics.gauge(
+    "background_tasks_queued",
+    "Number of background tasks waiting for a worker.",
+    lambda: task_queue.size,
+)
@@ -3,9 +3,16 @@ from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from main.libs.deadline import DeadlineExceeded
 from main.libs.log import get_logger
 
-from .exceptions import BaseError, InternalServerError, StatusCode, ValidationError
+from .exceptions import (
+    BaseError,
+    GatewayTimeout,
+    InternalServerError,
+    StatusCode,
+    ValidationError,
+)
 
 logger = get_logger(__name__)
 
@@ -50,6 +57,14 @@ def register_error_handlers(app: FastAPI):
         )
         return error.to_response()
 
+    @app.exception_handler(DeadlineExceeded)
+    async def handle_deadline_exceeded(_, e: DeadlineExceeded):
+        # Either the deadline of the request expired, or its client disconnected
+        reason = "cancelled" if e.cancelled else "deadline"
+        logger.warning(str(e), data={"reason": reason})
+
+        return GatewayTimeout(error_data={"reason": reason}).to_response()
+
     @app.exception_handler(Exception)
     async def handle_exception(_, e):
         logger.exception(str(e))
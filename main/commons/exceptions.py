@@ -1,7 +1,7 @@
-from fastapi.responses import JSONResponse
-
 from main.schemas.exceptions import ErrorSchema
 
+from .responses import FastJSONResponse
+
 
 class StatusCode:
     BAD_REQUEST = 400
@@ -10,6 +10,8 @@ class StatusCode:
     NOT_FOUND = 404
     METHOD_NOT_ALLOWED = 405
     INTERNAL_SERVER_ERROR = 500
+    SERVICE_UNAVAILABLE = 503
+    GATEWAY_TIMEOUT = 504
 
 
 class ErrorCode:
@@ -20,6 +22,8 @@ class ErrorCode:
     NOT_FOUND = 404000
     METHOD_NOT_ALLOWED = 405000
     INTERNAL_SERVER_ERROR = 500000
+    SERVICE_UNAVAILABLE = 503000
+    GATEWAY_TIMEOUT = 504000
 
 
 class _ErrorMessage:
@@ -30,6 +34,8 @@ class _ErrorMessage:
     NOT_FOUND = "Not found."
     METHOD_NOT_ALLOWED = "Method not allowed."
     INTERNAL_SERVER_ERROR = "Internal server error."
+    SERVICE_UNAVAILABLE = "Service unavailable."
+    GATEWAY_TIMEOUT = "Gateway timeout."
 
 
 class BaseError(Exception):
@@ -61,10 +67,13 @@ class BaseError(Exception):
         self.error_data = error_data
 
     def to_response(self):
-        return JSONResponse(
-            ErrorSchema.model_validate(self).model_dump(mode="json"),
-            self.status_code,
+        # The fields are set by the application, so they are not validated
+        error = ErrorSchema.model_construct(
+            error_message=self.error_message,
+            error_data=self.error_data,
+            error_code=self.error_code,
         )
+        return FastJSONResponse(error, self.status_code)
 
 
 class BadRequest(BaseError):
@@ -101,3 +110,15 @@ class InternalServerError(BaseError):
     status_code = StatusCode.INTERNAL_SERVER_ERROR
     error_message = _ErrorMessage.INTERNAL_SERVER_ERROR
     error_code = ErrorCode.INTERNAL_SERVER_ERROR
+
+
+class ServiceUnavailable(BaseError):
+    status_code = StatusCode.SERVICE_UNAVAILABLE
+    error_message = _ErrorMessage.SERVICE_UNAVAILABLE
+    error_code = ErrorCode.SERVICE_UNAVAILABLE
+
+
+class GatewayTimeout(BaseError):
+    status_code = StatusCode.GATEWAY_TIMEOUT
+    error_message = _ErrorMessage.GATEWAY_TIMEOUT
+    error_code = ErrorCode.GATEWAY_TIMEOUT
@@ -0,0 +1,24 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from main.libs import serialization
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response serializing pydantic models directly with pydantic-core, and
+    other content with orjson if it is installed.
+
+    Returning this response from an endpoint skips the ``jsonable_encoder`` pass
+    of FastAPI, so the endpoint should declare its ``response_model`` for the docs.
+    Pydantic models nested in other content are not supported, they should be
+    wrapped in a schema instead.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+
+        return serialization.dumps_bytes(content)
@@ -1,17 +1,73 @@
-from fastapi import APIRouter
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from typing import Any
 
-from main.engines.items import add_item, count_items
+import pydantic
+from fastapi import APIRouter, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
 
-router: APIRouter = APIRouter()
+from main import config
+from main.commons.responses import FastJSONResponse
+from main.engines.items import (
+    ITEMS_CACHE_TAG,
+    add_item,
+    add_items,
+    count_items,
+    list_items,
+    stream_items,
+)
+from main.libs import serialization
+from main.libs.iterables import as_async_iterator
+from main.libs.ndjson import NDJSON_MEDIA_TYPE, encode_ndjson, iter_ndjson
+from main.libs.response_cache import CachedRoute, response_cache
+from main.schemas.item import (
+    ItemCountSchema,
+    ItemCreateSchema,
+    ItemIdsSchema,
+    ItemListSchema,
+    ItemSchema,
+)
 
+router: APIRouter = APIRouter(route_class=CachedRoute)
 
-@router.get("/items/count")
+
+@router.get("/items/count", response_model=ItemCountSchema)
+@response_cache.cached(ttl=config.ITEMS_RESPONSE_CACHE_TTL, tags=[ITEMS_CACHE_TAG])
 async def get_items_count():
     count = await count_items()
 
-    return {
-        "count": count,
-    }
+    return FastJSONResponse(ItemCountSchema(count=count))
+
+
+@router.get("/items", response_model=ItemListSchema)
+@response_cache.cached(ttl=config.ITEMS_RESPONSE_CACHE_TTL, tags=[ITEMS_CACHE_TAG])
+async def get_items(
+    cursor: int | None = None,
+    limit: int = Query(100, ge=1, le=1_000),
+):
+    """
+    List items by ascending ID. To get the next page, pass the returned
+    ``next_cursor`` as ``cursor``, until it is null.
+    """
+
+    items = await list_items(cursor, limit)
+
+    return FastJSONResponse(
+        ItemListSchema(
+            items=[ItemSchema.model_validate(item) for item in items],
+            next_cursor=items[-1].id if len(items) == limit else None,
+        ),
+    )
+
+
+@router.get("/items/export")
+async def export_items(cursor: int | None = None):
+    """Stream all the items by ascending ID as newline-delimited JSON."""
+
+    return StreamingResponse(
+        encode_ndjson(stream_items(cursor)),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
 
 
 @router.post("/items")
@@ -19,3 +75,81 @@ async def _add_item():
     await add_item()
 
     return {}
+
+
+@router.post("/items/batch", response_model=ItemIdsSchema)
+async def _add_items(request: Request):
+    """
+    Add many items at once, from a JSON array of items, or from newline-delimited
+    JSON items (``application/x-ndjson``) which are inserted while streaming.
+    """
+
+    payloads: Iterable[Any] | AsyncIterable[Any]
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        payloads = iter_ndjson(request.stream())
+    else:
+        payloads = _parse_json_array(await request.body())
+
+    ids = await add_items(_validate_items(payloads))
+
+    return FastJSONResponse(ItemIdsSchema(ids=ids))
+
+
+def _parse_json_array(body: bytes) -> list[Any]:
+    try:
+        payloads = serialization.loads(body)
+    except serialization.JSONDecodeError as e:
+        raise _json_decode_error(e) from e
+
+    if not isinstance(payloads, list):
+        raise RequestValidationError(
+            [
+                {
+                    "type": "list_type",
+                    "loc": ("body",),
+                    "msg": "Input should be a valid list",
+                    "input": payloads,
+                },
+            ],
+        )
+
+    return payloads
+
+
+async def _validate_items(
+    payloads: Iterable[Any] | AsyncIterable[Any],
+) -> AsyncIterator[dict | None]:
+    index = 0
+    try:
+        async for payload in as_async_iterator(payloads):
+            yield _validate_item(index, payload)
+            index += 1
+    except serialization.JSONDecodeError as e:
+        raise _json_decode_error(e, index) from e
+
+
+def _validate_item(index: int, payload: Any) -> dict | None:
+    try:
+        data = ItemCreateSchema.model_validate(payload).data
+        return data.model_dump(exclude_unset=True) if data is not None else None
+    except pydantic.ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", index, *error["loc"])} for error in e.errors()],
+        ) from e
+
+
+def _json_decode_error(
+    error: serialization.JSONDecodeError,
+    index: int | None = None,
+) -> RequestValidationError:
+    return RequestValidationError(
+        [
+            {
+                "type": "json_invalid",
+                "loc": ("body", error.pos if index is None else index),
+                "msg": "JSON decode error",
+                "input": {},
+                "ctx": {"error": error.msg},
+            },
+        ],
+    )
@@ -1,4 +1,9 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from main import health_monitor
+from main.commons.exceptions import ServiceUnavailable
+from main.libs.metrics import metrics
 
 router = APIRouter()
 
@@ -10,4 +15,16 @@ async def ping():
 
 @router.get("/ready")
 async def is_ready():
+    # The health is checked in the background, so that probes never hit the DB
+    if not health_monitor.is_healthy:
+        # Returned rather than raised, so that failing probes are not logged
+        return ServiceUnavailable(
+            error_data={"status": health_monitor.status},
+        ).to_response()
+
     return {}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,19 +1,194 @@
-from sqlalchemy import func, select
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
 
-from main import db
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.types import TypeEngine
+
+from main import config, db
+from main.libs.cached_count import CachedCount
+from main.libs.deadline import enforce_deadline
+from main.libs.iterables import iter_chunks
+from main.libs.response_cache import response_cache
+from main.libs.single_flight import single_flight
+from main.libs.write_buffer import CoalescingWriteBuffer
+from main.models.base import json_field
 from main.models.item import ItemModel
 
+# Tag of the cached responses depending on the items
+ITEMS_CACHE_TAG = "items"
 
-async def count_items() -> int:
+# Concurrent identical reads share a single query. It runs in its own session, so
+# that it does not depend on the request which started it, nor sees its writes,
+# within the longest deadline of a request. Each request still waits within its
+# own deadline. The requests with an open transaction, e.g. with their own writes,
+# are not coalesced, since the shared query would not see it, and would need a
+# second connection. Nor are the requests reading from the primary, since the
+# shared query may read from a replica.
+coalesced = single_flight(
+    scope=lambda: db.scope(lazy=True, timeout=config.SQLALCHEMY_REQUEST_DEADLINE),
+    wait=enforce_deadline,
+    bypass=lambda: db.in_transaction or db.uses_primary,
+)
+
+
+@coalesced
+async def _query_items_count() -> int:
     statement = select(func.count()).select_from(ItemModel)
     result = await db.session.execute(statement)
-    return result.scalar()
+    return result.scalar_one()
+
+
+items_count = CachedCount(_query_items_count, ttl=config.ITEMS_COUNT_CACHE_TTL)
+
+
+async def count_items() -> int:
+    return await items_count.get()
+
+
+@coalesced
+async def list_items(cursor: int | None, limit: int) -> list[ItemModel]:
+    """
+    List items ordered by ID, using keyset pagination: the page starts after the
+    item with ID ``cursor``, so the cost does not depend on the page position.
+
+    The list is shared by the concurrent callers, so it must not be mutated.
+    """
+
+    statement = select(ItemModel).order_by(ItemModel.id).limit(limit)
+    if cursor is not None:
+        statement = statement.where(ItemModel.id > cursor)
+
+    result = await db.session.scalars(statement)
+    return list(result)
+
+
+def item_data(key: str, type_: TypeEngine | None = None) -> ColumnElement:
+    """
+    The value at ``key`` of the item data, to filter on with ``find_items``, e.g.
+    ``item_data("price") >= 100``. The hot keys are read from their indexed
+    column, the others are scanned as ``type_``, a string by default.
+    """
+    return json_field(ItemModel.data, key, type_)
+
+
+async def find_items(
+    *conditions: ColumnElement[bool],
+    cursor: int | None = None,
+    limit: int = 100,
+) -> list[ItemModel]:
+    """List the items matching all the ``conditions``, like ``list_items``."""
+
+    statement = select(ItemModel).where(*conditions).order_by(ItemModel.id).limit(limit)
+    if cursor is not None:
+        statement = statement.where(ItemModel.id > cursor)
+
+    result = await db.session.scalars(statement)
+    return list(result)
+
+
+async def stream_items(
+    cursor: int | None = None,
+    chunk_size: int | None = None,
+) -> AsyncIterator[list[dict]]:
+    """
+    Stream all the items after ``cursor`` ordered by ID, in chunks of
+    ``chunk_size`` items, from a server-side cursor.
+
+    Rows are fetched as plain tuples without ORM objects, so the memory usage
+    does not depend on the number of items.
+    """
+
+    chunk_size = chunk_size or config.ITEMS_EXPORT_CHUNK_SIZE
+    statement = (
+        select(ItemModel.id, ItemModel.data)
+        .order_by(ItemModel.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    if cursor is not None:
+        statement = statement.where(ItemModel.id > cursor)
+
+    result = await db.session.stream(statement)
+    async for rows in result.partitions():
+        yield [{"id": item_id, "data": data} for item_id, data in rows]
 
 
 async def add_item() -> ItemModel:
+    if config.ITEMS_WRITE_BEHIND_ENABLED:
+        item_id = await items_write_buffer.submit({})
+        return ItemModel(id=item_id, data={})
+
     item = ItemModel(data={})
 
     db.session.add(item)
     await db.session.commit()
+    items_count.increment()
+    await response_cache.invalidate_tags(ITEMS_CACHE_TAG)
 
     return item
+
+
+async def add_items(
+    items: Iterable[dict | None] | AsyncIterable[dict | None],
+    chunk_size: int | None = None,
+) -> list[int]:
+    """
+    Insert the data of many items with multi-row INSERTs of ``chunk_size`` rows,
+    all in a single transaction.
+
+    ``items`` can be an async iterable, e.g. parsed from a request stream, in which
+    case only one chunk is kept in memory at a time.
+
+    :return: the IDs of the inserted items, in the same order as ``items``
+    """
+
+    session = db.session
+    ids: list[int] = []
+
+    try:
+        async for chunk in iter_chunks(
+            items,
+            chunk_size or config.ITEMS_BATCH_CHUNK_SIZE,
+        ):
+            ids.extend(await _insert_items(session, chunk))
+
+        await session.commit()
+    except BaseException:
+        await session.rollback()
+        raise
+
+    items_count.increment(len(ids))
+    await response_cache.invalidate_tags(ITEMS_CACHE_TAG)
+
+    return ids
+
+
+async def _insert_items(session: AsyncSession, chunk: list[dict | None]) -> list[int]:
+    rows = [{"data": data} for data in chunk]
+
+    if session.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = await session.execute(
+            insert(ItemModel).returning(ItemModel.id, sort_by_parameter_order=True),
+            rows,
+        )
+        return list(result.scalars())
+
+    # Without RETURNING (MySQL), the rows of a multi-row INSERT are assigned
+    # consecutive IDs starting from LAST_INSERT_ID(), since the number of rows is
+    # known in advance (with any innodb_autoinc_lock_mode and an increment of 1)
+    result = await session.execute(insert(ItemModel).values(rows))
+    first_id = result.lastrowid  # type: ignore[attr-defined]
+    return list(range(first_id, first_id + len(rows)))
+
+
+async def _write_items(batch: list[dict | None]) -> list[int]:
+    # The batch is shared by many requests, so it is written in its own session
+    async with db.scope(lazy=True):
+        return await add_items(batch)
+
+
+items_write_buffer: CoalescingWriteBuffer[dict | None, int] = CoalescingWriteBuffer(
+    _write_items,
+    max_size=config.ITEMS_WRITE_BEHIND_MAX_SIZE,
+    max_delay=config.ITEMS_WRITE_BEHIND_MAX_DELAY,
+)
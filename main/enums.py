@@ -1,4 +1,4 @@
-from enum import Enum, unique
+from enum import Enum, auto, unique
 
 
 @unique
@@ -15,3 +15,27 @@ class BaseEnum(str, Enum):
     def get_values(cls) -> list[str]:
         # noinspection PyUnresolvedReferences
         return [m.value for m in cls]
+
+
+class LogQueueFullPolicy(BaseEnum):
+    DROP = auto()
+    BLOCK = auto()
+
+
+class LogFormat(BaseEnum):
+    TEXT = auto()
+    JSON = auto()
+
+
+class ReplicaStrategy(BaseEnum):
+    ROUND_ROBIN = auto()
+    LEAST_CONNECTIONS = auto()
+
+
+class HealthStatus(BaseEnum):
+    STARTING = auto()
+    HEALTHY = auto()
+    # The dependencies cannot be reached
+    DEGRADED = auto()
+    # The dependencies are saturated, new requests would have to wait
+    OVERLOADED = auto()
@@ -0,0 +1,38 @@
+import time
+from collections.abc import Awaitable, Callable
+
+
+class CachedCount:
+    """
+    Keep a count in process, maintained incrementally by the writers.
+
+    The count is reconciled by calling ``fetch`` when it is older than ``ttl``
+    seconds, which bounds how stale it can be, e.g. because of writes from other
+    processes, or increments racing with a reconciliation. A ``ttl`` of 0 disables
+    the cache, so that every ``get`` calls ``fetch``.
+    """
+
+    def __init__(self, fetch: Callable[[], Awaitable[int]], ttl: float):
+        self.fetch = fetch
+        self.ttl = ttl
+        self._value: int | None = None
+        self._fetched_at = 0.0
+
+    async def get(self) -> int:
+        if self.ttl <= 0:
+            return await self.fetch()
+
+        if self._value is None or time.monotonic() - self._fetched_at >= self.ttl:
+            fetched_at = time.monotonic()
+            self._value = await self.fetch()
+            self._fetched_at = fetched_at
+
+        return self._value
+
+    def increment(self, amount: int = 1):
+        """Record committed writes, without waiting for the next reconciliation."""
+        if self._value is not None:
+            self._value += amount
+
+    def invalidate(self):
+        self._value = None
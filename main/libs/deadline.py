@@ -0,0 +1,184 @@
+import asyncio
+import re
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import (
+    AbstractAsyncContextManager,
+    asynccontextmanager,
+    contextmanager,
+    nullcontext,
+)
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, ExecutionContext
+
+
+class DeadlineExceeded(TimeoutError):
+    """A statement was cancelled, because its deadline expired or was cancelled."""
+
+    def __init__(self, cancelled: bool):
+        super().__init__("Cancelled" if cancelled else "Deadline exceeded")
+        self.cancelled = cancelled
+
+
+class _Timeout:
+    """
+    Cancel the current task at ``when``, in loop time, like ``asyncio.timeout_at``
+    which is only available from Python 3.11.
+    """
+
+    def __init__(self, when: float | None):
+        task = asyncio.current_task()
+        assert task is not None
+        self._task = task
+        self._handle: asyncio.TimerHandle | None = None
+        self.expired = False
+        self.reschedule(when)
+
+    def reschedule(self, when: float | None):
+        self.close()
+        if when is not None:
+            self._handle = asyncio.get_running_loop().call_at(when, self._expire)
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _expire(self):
+        self._handle = None
+        self.expired = True
+        self._task.cancel()
+
+    def uncancel(self):
+        # Python 3.11+ counts the cancellation requests, for structured concurrency
+        uncancel = getattr(self._task, "uncancel", None)
+        if uncancel is not None:
+            uncancel()
+
+
+class Deadline:
+    """
+    The deadline of the statements of a database scope, in seconds from now, or
+    without time limit for ``None``.
+
+    The statements run inside ``enforce``, which cancels them once the deadline
+    expires, or as soon as ``cancel`` is called, e.g. when the client disconnects.
+    ``on_enforce`` is called before each statement.
+    """
+
+    def __init__(
+        self,
+        timeout: float | None = None,
+        on_enforce: Callable[[], None] | None = None,
+    ):
+        self.expires_at = (
+            asyncio.get_running_loop().time() + timeout if timeout is not None else None
+        )
+        self.on_enforce = on_enforce
+        self.cancelled = False
+        # The timeouts of the running statements
+        self._timeouts: set[_Timeout] = set()
+
+    def remaining(self) -> float | None:
+        if self.expires_at is None:
+            return None
+
+        return self.expires_at - asyncio.get_running_loop().time()
+
+    @contextmanager
+    def shorten(self, timeout: float) -> Iterator[None]:
+        """Expire at most ``timeout`` seconds from now, inside the block."""
+
+        expires_at = self.expires_at
+        new_expires_at = asyncio.get_running_loop().time() + timeout
+        if expires_at is None or new_expires_at < expires_at:
+            self.expires_at = new_expires_at
+
+        try:
+            yield
+        finally:
+            self.expires_at = expires_at
+
+    def cancel(self):
+        self.cancelled = True
+
+        now = asyncio.get_running_loop().time()
+        for timeout in self._timeouts:
+            timeout.reschedule(now)
+
+    @asynccontextmanager
+    async def enforce(self) -> AsyncIterator[None]:
+        if self.on_enforce is not None:
+            self.on_enforce()
+        if self.cancelled:
+            raise DeadlineExceeded(cancelled=True)
+
+        timeout = _Timeout(self.expires_at)
+        self._timeouts.add(timeout)
+        try:
+            yield
+        except asyncio.CancelledError as e:
+            if timeout.expired:
+                timeout.uncancel()
+                raise DeadlineExceeded(cancelled=self.cancelled) from e
+            raise
+        finally:
+            timeout.close()
+            self._timeouts.discard(timeout)
+
+
+deadline_context: ContextVar[Deadline | None] = ContextVar(
+    "deadline_context",
+    default=None,
+)
+
+
+def enforce_deadline() -> AbstractAsyncContextManager[None]:
+    """Enforce the current deadline, if any, on the block, like a statement."""
+
+    deadline = deadline_context.get()
+    return deadline.enforce() if deadline is not None else nullcontext()
+
+
+_SELECT_PATTERN = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+
+
+def limit_execution_time(engine: Engine):
+    """
+    Add the remaining time of the current deadline to the SELECT statements of a
+    MySQL ``engine``, as a ``MAX_EXECUTION_TIME`` optimizer hint, so that the
+    server also stops running them, even once the client gave up on them.
+
+    The streamed SELECTs, with ``stream_results`` or ``yield_per``, are not
+    limited, since the server keeps running them while the rows are fetched, which
+    the deadline does not cover.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def before_cursor_execute(conn, cursor, statement: str, parameters, context, _):
+        deadline = deadline_context.get()
+        remaining = deadline.remaining() if deadline is not None else None
+
+        if (
+            remaining is not None
+            and _SELECT_PATTERN.match(statement)
+            and not _is_streamed(context)
+        ):
+            # 0 means no limit for MySQL
+            milliseconds = max(int(remaining * 1_000), 1)
+            statement = _SELECT_PATTERN.sub(
+                f"SELECT /*+ MAX_EXECUTION_TIME({milliseconds}) */",
+                statement,
+                count=1,
+            )
+
+        return statement, parameters
+
+
+def _is_streamed(context: ExecutionContext | None) -> bool:
+    if context is None:
+        return False
+
+    options = context.execution_options
+    return bool(options.get("stream_results") or options.get("yield_per"))
@@ -0,0 +1,78 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+
+from main.enums import HealthStatus
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+
+class HealthMonitor:
+    """
+    Run a health check in the background every ``interval`` seconds and cache its
+    result, so that reading the health status is O(1) and never hits the
+    dependencies.
+
+    A check raising an exception or taking longer than ``timeout`` seconds
+    reports the service as degraded. With an ``interval`` of 0, the checks are
+    disabled, and the service is reported healthy once started, since nothing
+    would update its status otherwise.
+    """
+
+    def __init__(
+        self,
+        check: Callable[[], Awaitable[HealthStatus]],
+        interval: float,
+        timeout: float,
+    ):
+        self.check = check
+        self.interval = interval
+        self.timeout = timeout
+        self.status = HealthStatus.STARTING
+        self._task: asyncio.Task | None = None
+
+    @property
+    def is_healthy(self) -> bool:
+        return self.status == HealthStatus.HEALTHY
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    async def update(self) -> HealthStatus:
+        try:
+            status = await asyncio.wait_for(self.check(), self.timeout)
+        except Exception as e:
+            logger.warning("Health check failed", data={"error": e})
+            status = HealthStatus.DEGRADED
+
+        self._set_status(status)
+        return status
+
+    def start(self):
+        if not self.enabled:
+            self._set_status(HealthStatus.HEALTHY)
+        elif self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def _set_status(self, status: HealthStatus):
+        if status != self.status:
+            logger.info(
+                "Health status changed",
+                data={"from": self.status, "to": status},
+            )
+            self.status = status
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.update()
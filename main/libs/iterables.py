@@ -0,0 +1,31 @@
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+async def as_async_iterator(items: Iterable[T] | AsyncIterable[T]) -> AsyncIterator[T]:
+    """Iterate asynchronously over either a sync or an async iterable."""
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def iter_chunks(
+    items: Iterable[T] | AsyncIterable[T],
+    chunk_size: int,
+) -> AsyncIterator[list[T]]:
+    """Group items into lists of ``chunk_size`` items, the last one may be shorter."""
+    chunk: list[T] = []
+
+    async for item in as_async_iterator(items):
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
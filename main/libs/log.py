@@ -1,20 +1,31 @@
-import json
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
+from typing import TextIO
 
-from main import config
+from main._config import config
+from main.enums import LogFormat, LogQueueFullPolicy
+
+from . import serialization
 
 
 def get_logger(name: str):
     logger = logging.getLogger(name)
     logger.setLevel(config.LOGGING_LEVEL)
 
-    formatter = logging.Formatter(
-        "[%(asctime)s][%(name)s][%(levelname)s]"
-        " (%(module)s:%(funcName)s:%(lineno)d) %(message)s",
-    )
+    formatter: logging.Formatter
+    if config.LOGGING_FORMAT == LogFormat.JSON:
+        formatter = JSONFormatter()
+    else:
+        formatter = TextFormatter(
+            "[%(asctime)s][%(name)s][%(levelname)s]"
+            " (%(module)s:%(funcName)s:%(lineno)d) %(message)s",
+        )
 
-    handler = logging.StreamHandler(stream=sys.stdout)
+    handler = create_log_handler()
     handler.setFormatter(formatter)
 
     if not logger.hasHandlers():
@@ -25,6 +36,209 @@ def get_logger(name: str):
     return logger
 
 
+def create_log_handler() -> logging.Handler:
+    """
+    Create the handler writing log records to stdout.
+
+    If ``LOGGING_QUEUE_ENABLED`` is set, records are formatted on the calling
+    thread and written to stdout by the background thread of the log pipeline,
+    so that logging never blocks the event loop on a slow stdout.
+    """
+    if config.LOGGING_QUEUE_ENABLED:
+        return _QueueLogHandler(get_log_pipeline())
+
+    return logging.StreamHandler(stream=sys.stdout)
+
+
+class LogPipeline:
+    """
+    Write formatted log lines from a bounded queue in a background thread.
+
+    Lines are written in batches of up to ``batch_size`` lines with a single
+    write and flush. When the queue is full, lines are either dropped (and
+    counted in ``dropped``) or the caller blocks until there is room,
+    depending on ``full_policy``. Once stopped, lines are written directly by
+    the caller, since nothing reads the queue anymore.
+    """
+
+    _STOP = None
+
+    def __init__(
+        self,
+        stream: TextIO,
+        max_size: int,
+        batch_size: int,
+        full_policy: LogQueueFullPolicy,
+    ):
+        self.stream = stream
+        self.batch_size = batch_size
+        self.full_policy = full_policy
+        self.queue: queue.Queue[str | None] = queue.Queue(max_size)
+        self.dropped = 0
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def put(self, line: str):
+        if self._stopped:
+            self._write([line])
+            return
+
+        if self.full_policy == LogQueueFullPolicy.BLOCK:
+            self.queue.put(line)
+            return
+
+        try:
+            self.queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._stopped = False
+            self._thread = threading.Thread(
+                target=self._run,
+                name="log-pipeline",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Write all pending lines, then stop the background thread."""
+        with self._lock:
+            if self._thread is None:
+                return
+
+            self._stopped = True
+            self.queue.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+
+            # The lines put while stopping, after the stop marker
+            lines = []
+            while not self.queue.empty():
+                lines.append(self.queue.get_nowait())
+            self._write([line for line in lines if line is not self._STOP])
+
+    def _run(self):
+        while True:
+            lines = [self.queue.get()]
+            # This thread is the only consumer, so these lines are already queued
+            pending = min(self.queue.qsize(), self.batch_size - 1)
+            lines.extend(self.queue.get_nowait() for _ in range(pending))
+
+            stopped = self._STOP in lines
+            self._write([line for line in lines if line is not self._STOP])
+
+            if stopped:
+                return
+
+    def _write(self, lines: list[str]):
+        if not lines:
+            return
+
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:  # noqa: S110
+            # There is nowhere left to report a failure to write logs
+            pass
+
+
+class _QueueLogHandler(logging.handlers.QueueHandler):
+    def __init__(self, pipeline: LogPipeline):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def prepare(self, record: logging.LogRecord) -> str:  # type: ignore[override]
+        return self.format(record)
+
+    def enqueue(self, line: str):  # type: ignore[override]
+        self.pipeline.put(line)
+
+
+_log_pipeline: LogPipeline | None = None
+
+
+def get_log_pipeline() -> LogPipeline:
+    global _log_pipeline
+
+    if _log_pipeline is None:
+        _log_pipeline = LogPipeline(
+            stream=sys.stdout,
+            max_size=config.LOGGING_QUEUE_SIZE,
+            batch_size=config.LOGGING_QUEUE_BATCH_SIZE,
+            full_policy=config.LOGGING_QUEUE_FULL_POLICY,
+        )
+        _log_pipeline.start()
+
+    return _log_pipeline
+
+
+def shutdown_logging():
+    """
+    Flush the log pipeline, if any. Called when the application shuts down. The
+    handlers of the pipeline then write directly, and the handlers created
+    afterwards start a new one.
+    """
+    global _log_pipeline
+
+    if _log_pipeline is not None:
+        _log_pipeline.stop()
+        _log_pipeline = None
+
+
+atexit.register(shutdown_logging)
+
+
+class TextFormatter(logging.Formatter):
+    """Format records as text, with their data payload appended as JSON."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        data = getattr(record, "data", None)
+        if data:
+            record.message = f"{record.message} | {serialization.dumps(data)}"
+
+        return super().formatMessage(record)
+
+
+class JSONFormatter(logging.Formatter):
+    """Format each record as a single-line JSON object."""
+
+    def __init__(self, encoder: serialization.JSONEncoder | None = None):
+        super().__init__()
+        self.encoder = encoder or serialization.dumps
+
+    def format(self, record: logging.LogRecord) -> str:
+        log = {
+            "time": record.created,
+            "logger": record.name,
+            "level": record.levelname,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "request_id": _get_request_id() or None,
+            "message": record.getMessage(),
+            "data": getattr(record, "data", None),
+        }
+
+        if record.exc_info:
+            log["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            log["stack_info"] = self.formatStack(record.stack_info)
+
+        return self.encoder(log)
+
+
+def _get_request_id() -> str:
+    from main._db import db
+
+    return db.request_id_context.get()
+
+
 class _CustomLogger(logging.Logger):
     def _log(  # type: ignore[override]
         self,
@@ -34,8 +248,13 @@ class _CustomLogger(logging.Logger):
         data=None,
         **kwargs,
     ):
+        # The data payload is only serialized by the formatters,
+        # and only if the record is actually emitted
         if data:
-            msg = f"{msg} | {json.dumps(data, default=str)}"
+            kwargs["extra"] = {**(kwargs.get("extra") or {}), "data": data}
+
+        # Skip this frame, so that the caller's module and line are recorded
+        kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
 
         # noinspection PyProtectedMember
         super()._log(level, msg, args, **kwargs)
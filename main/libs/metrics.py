@@ -0,0 +1,187 @@
+"""
+Minimal Prometheus-style metrics.
+
+Metrics are only recorded from the event loop thread, so the counters and
+histogram buckets are plain numbers updated without any locking. Histograms
+are pre-bucketed: recording a value is a binary search and two additions.
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Sequence
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = tuple[str, ...]
+
+
+class _Metric(ABC):
+    type: str
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self._render_samples()
+
+    @abstractmethod
+    def _render_samples(self) -> Iterable[str]:
+        pass
+
+    def _format_labels(self, labels: Labels, extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(self.label_names, labels, strict=True)
+        ]
+        if extra:
+            pairs.append(extra)
+
+        return f"{{{','.join(pairs)}}}" if pairs else ""
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+    ):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def _render_samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{self._format_labels(labels)} {value}"
+
+
+class Gauge(_Metric):
+    """A gauge whose value is read from ``callback`` when the metrics are scraped."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], float | None],
+    ):
+        super().__init__(name, documentation, ())
+        self.callback = callback
+
+    def _render_samples(self) -> Iterable[str]:
+        value = self.callback()
+        if value is not None:
+            yield f"{self.name} {value}"
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = sorted(buckets)
+        self._series: dict[Labels, _HistogramSeries] = {}
+
+    def observe(self, value: float, labels: Labels = ()):
+        series = self._series.get(labels)
+        if series is None:
+            # The last bucket counts the values above all bounds (le="+Inf")
+            series = self._series[labels] = _HistogramSeries(len(self.buckets) + 1)
+
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+
+    def _render_samples(self) -> Iterable[str]:
+        bounds = [*map(str, self.buckets), "+Inf"]
+        for labels, series in self._series.items():
+            cumulative_count = 0
+            for bound, count in zip(bounds, series.counts, strict=True):
+                cumulative_count += count
+                bucket_labels = self._format_labels(labels, f'le="{bound}"')
+                yield f"{self.name}_bucket{bucket_labels} {cumulative_count}"
+
+            yield f"{self.name}_sum{self._format_labels(labels)} {series.sum}"
+            yield f"{self.name}_count{self._format_labels(labels)} {cumulative_count}"
+
+
+class MetricsRegistry:
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def counter(self, name: str, documentation: str, label_names=()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], float | None],
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names=(),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        lines = [line for metric in self._metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+
+        self._metrics[metric.name] = metric
+        return metric
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = MetricsRegistry()
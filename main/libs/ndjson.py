@@ -0,0 +1,35 @@
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from typing import Any
+
+from . import serialization
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """
+    Parse newline-delimited JSON from a stream of byte chunks, one value per line.
+
+    Blank lines are skipped. Only the current incomplete line is kept in memory.
+    """
+
+    buffer = b""
+    async for chunk in chunks:
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield serialization.loads(line)
+
+    if buffer.strip():
+        yield serialization.loads(buffer)
+
+
+async def encode_ndjson(
+    chunks: AsyncIterable[Iterable[Any]],
+) -> AsyncIterator[bytes]:
+    """Encode chunks of values as newline-delimited JSON, one value per line."""
+
+    async for chunk in chunks:
+        lines = [serialization.dumps_bytes(value) for value in chunk]
+        if lines:
+            yield b"\n".join(lines) + b"\n"
@@ -0,0 +1,91 @@
+import re
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, ExceptionContext
+
+from main._config import config
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+
+class QueryStats:
+    """Number of queries and cumulative database time of a single request."""
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+query_stats_context: ContextVar[QueryStats | None] = ContextVar(
+    "query_stats_context",
+    default=None,
+)
+
+_FINGERPRINT_SUBSTITUTIONS = [
+    # String literals
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'"), "?"),
+    # Numeric literals, outside identifiers
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    # Bound parameters, for every DBAPI paramstyle
+    (re.compile(r"%s|%\(\w+\)s|:\w+|\?"), "?"),
+    (re.compile(r"\s+"), " "),
+    # IN lists and multi-row VALUES
+    (re.compile(r"\(\?(?:, ?\?)*\)"), "(?)"),
+    (re.compile(r"\(\?\)(?:, ?\(\?\))+"), "(?), ..."),
+]
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a SQL statement, so that statements differing only by their
+    literals or parameters have the same fingerprint.
+    """
+    for pattern, replacement in _FINGERPRINT_SUBSTITUTIONS:
+        statement = pattern.sub(replacement, statement)
+
+    return statement.strip()
+
+
+def instrument_engine(engine: Engine):
+    """
+    Count the queries run by ``engine`` and their duration in the
+    ``QueryStats`` of the current request, and log the slow queries.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, *_):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context: ExceptionContext):
+        # The failed statements never reach after_cursor_execute. The errors
+        # raised after it, e.g. while fetching, have nothing to pop.
+        connection = context.connection
+        start_times = connection.info.get("query_start_time") if connection else None
+        if start_times:
+            start_times.pop()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, _, statement: str, *__):
+        duration = time.perf_counter() - conn.info["query_start_time"].pop()
+
+        stats = query_stats_context.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += duration
+
+        threshold = config.SQLALCHEMY_SLOW_QUERY_THRESHOLD
+        if threshold is not None and duration >= threshold:
+            logger.warning(
+                "Slow query",
+                data={
+                    "fingerprint": fingerprint(statement),
+                    "duration": duration,
+                },
+            )
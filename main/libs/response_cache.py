@@ -0,0 +1,276 @@
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Coroutine, Iterable
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.responses import StreamingResponse
+
+from main._config import config
+
+_CACHE_OPTIONS_ATTRIBUTE = "__response_cache_options__"
+
+# Clients may keep the responses, but must revalidate them with the ETag
+_CACHE_CONTROL = "no-cache"
+
+_Endpoint = TypeVar("_Endpoint", bound=Callable[..., Any])
+_Handler = Callable[[Request], Coroutine[Any, Any, Response]]
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    status_code: int
+    raw_headers: list[tuple[bytes, bytes]]
+    etag: str
+
+    def to_response(self) -> Response:
+        response = Response(self.body, self.status_code)
+        response.raw_headers = list(self.raw_headers)
+        return response
+
+
+class CacheBackend(ABC):
+    """Storage of the cached responses, which could be shared between processes."""
+
+    @abstractmethod
+    async def get(self, key: str) -> CachedResponse | None:
+        ...
+
+    @abstractmethod
+    async def set(
+        self,
+        key: str,
+        value: CachedResponse,
+        ttl: float,
+        tags: Iterable[str] = (),
+    ):
+        ...
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: Iterable[str]):
+        """Remove the entries set with any of ``tags``."""
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+
+@dataclass
+class _LRUEntry:
+    value: CachedResponse
+    expires_at: float
+    tags: frozenset[str] = field(default_factory=frozenset)
+
+
+class LRUCacheBackend(CacheBackend):
+    """
+    In-process backend keeping at most ``max_size`` entries, evicting the least
+    recently used ones first.
+
+    Each process has its own cache, so writes from other processes are only seen
+    once the entries expire.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, _LRUEntry] = OrderedDict()
+        self._keys_by_tag: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry.value
+
+    async def set(
+        self,
+        key: str,
+        value: CachedResponse,
+        ttl: float,
+        tags: Iterable[str] = (),
+    ):
+        if self.max_size <= 0:
+            return
+
+        self._remove(key)
+
+        entry = _LRUEntry(value, time.monotonic() + ttl, frozenset(tags))
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    async def invalidate_tags(self, tags: Iterable[str]):
+        for tag in tags:
+            for key in self._keys_by_tag.pop(tag, set()):
+                self._remove(key)
+
+    async def clear(self):
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+@dataclass(frozen=True)
+class _CacheOptions:
+    cache: "ResponseCache"
+    ttl: float
+    tags: tuple[str, ...]
+
+
+class ResponseCache:
+    """
+    Cache the successful responses of GET endpoints, keyed by their path and query.
+
+    The responses are sent with an ETag, so that clients sending it back in
+    ``If-None-Match`` get a ``304 Not Modified`` without a body. The endpoints are
+    marked with ``cached``, and routed with ``CachedRoute``.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    def cached(
+        self,
+        ttl: float,
+        tags: Iterable[str] = (),
+    ) -> Callable[[_Endpoint], _Endpoint]:
+        """
+        Cache the responses of the decorated endpoint for ``ttl`` seconds, until
+        any of ``tags`` is invalidated. With a ``ttl`` of 0, the responses are not
+        stored, but still get an ETag.
+        """
+
+        options = _CacheOptions(self, ttl, tuple(tags))
+
+        def decorator(endpoint: _Endpoint) -> _Endpoint:
+            setattr(endpoint, _CACHE_OPTIONS_ATTRIBUTE, options)
+            return endpoint
+
+        return decorator
+
+    async def invalidate_tags(self, *tags: str):
+        await self.backend.invalidate_tags(tags)
+
+    async def clear(self):
+        await self.backend.clear()
+
+    async def handle(
+        self,
+        request: Request,
+        handler: _Handler,
+        ttl: float,
+        tags: tuple[str, ...],
+    ) -> Response:
+        if request.method not in ("GET", "HEAD"):
+            return await handler(request)
+
+        key = _get_key(request)
+        cached_response = await self.backend.get(key) if ttl > 0 else None
+
+        if cached_response is None:
+            response = await handler(request)
+
+            cached_response = _to_cached_response(response)
+            if cached_response is None:
+                return response
+
+            if ttl > 0:
+                await self.backend.set(key, cached_response, ttl, tags)
+
+        if _etag_matches(request.headers.get("if-none-match"), cached_response.etag):
+            return Response(
+                status_code=304,
+                headers={"etag": cached_response.etag, "cache-control": _CACHE_CONTROL},
+            )
+
+        return cached_response.to_response()
+
+
+class CachedRoute(APIRoute):
+    """Route serving the endpoints marked with ``ResponseCache.cached`` from cache."""
+
+    def get_route_handler(self) -> _Handler:
+        handler = super().get_route_handler()
+
+        options: _CacheOptions | None = getattr(
+            self.endpoint,
+            _CACHE_OPTIONS_ATTRIBUTE,
+            None,
+        )
+        if options is None:
+            return handler
+
+        async def cached_route_handler(request: Request) -> Response:
+            return await options.cache.handle(
+                request,
+                handler,
+                options.ttl,
+                options.tags,
+            )
+
+        return cached_route_handler
+
+
+def _get_key(request: Request) -> str:
+    query = "&".join(sorted(request.url.query.split("&")))
+    return f"{request.url.path}?{query}"
+
+
+def _to_cached_response(response: Response) -> CachedResponse | None:
+    if (
+        response.status_code != 200
+        or isinstance(response, StreamingResponse)
+        or response.background is not None
+        or "set-cookie" in response.headers
+    ):
+        return None
+
+    etag = f'"{hashlib.blake2b(response.body, digest_size=16).hexdigest()}"'
+    raw_headers = [
+        *response.raw_headers,
+        (b"etag", etag.encode("latin-1")),
+        (b"cache-control", _CACHE_CONTROL.encode("latin-1")),
+    ]
+
+    return CachedResponse(response.body, response.status_code, raw_headers, etag)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+
+    return any(
+        value.strip().removeprefix("W/") in (etag, "*")
+        for value in if_none_match.split(",")
+    )
+
+
+response_cache = ResponseCache(LRUCacheBackend(config.RESPONSE_CACHE_MAX_SIZE))
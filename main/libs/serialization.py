@@ -0,0 +1,42 @@
+"""
+Fast JSON serialization.
+
+``orjson`` is used if it is installed (``pip install orjson``),
+otherwise this falls back to the standard library ``json`` module.
+"""
+
+import json
+from collections.abc import Callable
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+JSONEncoder = Callable[[Any], str]
+
+
+def stdlib_dumps(obj: Any) -> str:
+    return json.dumps(obj, default=str, separators=(",", ":"))
+
+
+def stdlib_dumps_bytes(obj: Any) -> bytes:
+    return stdlib_dumps(obj).encode()
+
+
+# orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+JSONDecodeError = json.JSONDecodeError
+
+
+if orjson is not None:
+
+    def orjson_dumps_bytes(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+    def orjson_dumps(obj: Any) -> str:
+        return orjson_dumps_bytes(obj).decode()
+
+    dumps, dumps_bytes, loads = orjson_dumps, orjson_dumps_bytes, orjson.loads
+else:  # pragma: no cover
+    dumps, dumps_bytes, loads = stdlib_dumps, stdlib_dumps_bytes, json.loads
@@ -0,0 +1,114 @@
+import asyncio
+import functools
+from collections.abc import Awaitable, Callable, Coroutine, Hashable
+from contextlib import AbstractAsyncContextManager
+from typing import Any, Generic, ParamSpec, TypeVar
+
+T = TypeVar("T")
+P = ParamSpec("P")
+
+
+class _Call(Generic[T]):
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future[T]):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesce concurrent calls with the same key: while a call is in flight, the
+    callers with the same key wait for its result instead of making their own.
+    The callers share the result, so they must not mutate it.
+
+    The call runs in its own task, so that cancelling a caller does not affect
+    the others. The call is only cancelled once all its callers are. If it fails,
+    every caller gets the exception. Calls made after it completes start a new
+    one, nothing is cached.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call[T]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(functools.partial(self._forget, key, call))
+
+        call.waiters += 1
+        try:
+            # Shielded, so that a cancelled caller does not cancel the call
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1:
+                # The next callers start a new call, rather than getting cancelled
+                self._forget(key, call)
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, call: _Call[T], *_):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+def single_flight(
+    key: Callable[..., Hashable] | None = None,
+    scope: Callable[[], AbstractAsyncContextManager] | None = None,
+    wait: Callable[[], AbstractAsyncContextManager] | None = None,
+    bypass: Callable[[], bool] | None = None,
+) -> Callable[
+    [Callable[P, Coroutine[Any, Any, T]]],
+    Callable[P, Coroutine[Any, Any, T]],
+]:
+    """
+    Coalesce the concurrent calls of an async function with ``SingleFlight``.
+
+    The calls are coalesced by their arguments, which must be hashable, unless
+    ``key`` computes the key from them. The shared call runs in a new context,
+    ``scope()``, e.g. its own database scope, rather than in the context of its
+    first caller. Each caller waits for it inside its own ``wait()``, e.g. to
+    enforce its own deadline. When ``bypass()`` is true, the caller makes its own
+    call, in its own context, e.g. when it must read its own writes.
+    """
+
+    def decorator(
+        fn: Callable[P, Coroutine[Any, Any, T]],
+    ) -> Callable[P, Coroutine[Any, Any, T]]:
+        flight: SingleFlight[T] = SingleFlight()
+
+        async def call(*args: P.args, **kwargs: P.kwargs) -> T:
+            if scope is None:
+                return await fn(*args, **kwargs)
+
+            async with scope():
+                return await fn(*args, **kwargs)
+
+        @functools.wraps(fn)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            if bypass is not None and bypass():
+                return await fn(*args, **kwargs)
+
+            call_key = (
+                key(*args, **kwargs)
+                if key is not None
+                else (args, tuple(sorted(kwargs.items())))
+            )
+            shared_call = functools.partial(call, *args, **kwargs)
+            if wait is None:
+                return await flight.do(call_key, shared_call)
+
+            async with wait():
+                return await flight.do(call_key, shared_call)
+
+        wrapper.single_flight = flight  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
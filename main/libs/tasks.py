@@ -0,0 +1,164 @@
+import asyncio
+import contextvars
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractAsyncContextManager, nullcontext
+from typing import Any
+
+from .log import get_logger
+from .metrics import metrics
+
+logger = get_logger(__name__)
+
+tasks_total = metrics.counter(
+    "background_tasks_total",
+    "Total number of background tasks run, by outcome.",
+    ("task", "status"),
+)
+task_duration_seconds = metrics.histogram(
+    "background_task_duration_seconds",
+    "Background task latency in seconds, from enqueuing to completion.",
+    ("task",),
+)
+
+
+class TaskQueueFullError(RuntimeError):
+    pass
+
+
+class TaskQueueClosedError(RuntimeError):
+    pass
+
+
+class _Job:
+    __slots__ = ("fn", "args", "kwargs", "name", "enqueued_at")
+
+    def __init__(self, fn: Callable[..., Awaitable[Any]], args: tuple, kwargs: dict):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.name = getattr(fn, "__qualname__", repr(fn))
+        self.enqueued_at = time.perf_counter()
+
+
+class TaskQueue:
+    """
+    Run deferred work in the background, off the request path, with
+    ``concurrency`` workers.
+
+    ``enqueue`` returns immediately. At most ``max_size`` tasks wait for a worker,
+    beyond which ``enqueue`` raises ``TaskQueueFullError``, so that a slow
+    dependency cannot grow the queue without bounds. Each task runs in a new
+    ``scope()``, e.g. its own database scope. A failing task is retried up to
+    ``max_retries`` times, after ``retry_backoff`` seconds doubling on every
+    attempt, then logged and dropped.
+
+    The workers start on the first ``enqueue``, with an empty context, so that the
+    tasks do not inherit the context variables of a request. ``close`` stops
+    accepting tasks and waits for the queued ones, for at most ``timeout``
+    seconds.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        max_size: int,
+        max_retries: int = 0,
+        retry_backoff: float = 0.1,
+        scope: Callable[[], AbstractAsyncContextManager] | None = None,
+    ):
+        self.concurrency = concurrency
+        self.max_size = max_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.scope = scope
+        self._queue: asyncio.Queue[_Job] = asyncio.Queue(max_size)
+        self._workers: list[asyncio.Task] = []
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        """Number of tasks waiting for a worker."""
+        return self._queue.qsize()
+
+    def enqueue(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in the background."""
+
+        if self._closed:
+            raise TaskQueueClosedError("The task queue is closed")
+
+        try:
+            self._queue.put_nowait(_Job(fn, args, kwargs))
+        except asyncio.QueueFull:
+            raise TaskQueueFullError("The task queue is full") from None
+
+        if not self._workers:
+            self.start()
+
+    def start(self):
+        if self._workers:
+            return
+
+        context = contextvars.Context()
+        self._workers = [
+            # Not the context argument of create_task, which requires Python 3.11
+            context.copy().run(asyncio.create_task, self._work())
+            for _ in range(self.concurrency)
+        ]
+
+    async def close(self, timeout: float | None = None):
+        self._closed = True
+        if not self._workers:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Background tasks dropped on shutdown",
+                data={"count": self._queue.qsize()},
+            )
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: _Job):
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+            if await self._try(job, is_last_attempt=attempt == self.max_retries):
+                tasks_total.inc((job.name, "succeeded"))
+                break
+        else:
+            tasks_total.inc((job.name, "failed"))
+
+        duration = time.perf_counter() - job.enqueued_at
+        task_duration_seconds.observe(duration, (job.name,))
+
+    async def _try(self, job: _Job, is_last_attempt: bool) -> bool:
+        try:
+            async with self.scope() if self.scope is not None else nullcontext():
+                await job.fn(*job.args, **job.kwargs)
+        except Exception as e:
+            if is_last_attempt:
+                logger.exception("Background task failed", data={"task": job.name})
+            else:
+                tasks_total.inc((job.name, "retried"))
+                logger.warning(
+                    "Background task failed, retrying",
+                    data={"task": job.name, "error": e},
+                )
+            return False
+
+        return True
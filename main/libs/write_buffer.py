@@ -0,0 +1,93 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class WriteBufferClosedError(RuntimeError):
+    pass
+
+
+class CoalescingWriteBuffer(Generic[T, R]):
+    """
+    Coalesce concurrent writes into batches.
+
+    Submitted items are buffered and written with a single call to ``write`` once
+    ``max_size`` items are pending or ``max_delay`` seconds after the first one,
+    whichever comes first. ``write`` must return one result per item, in order.
+
+    Each submitter waits until its batch is written, then gets the result of its
+    own item. If writing the batch fails, every submitter of the batch gets the
+    exception. Cancelling a submitter does not remove its item from the batch.
+
+    ``close`` stops accepting items and waits until the pending ones are written.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[list[T]], Awaitable[list[R]]],
+        max_size: int,
+        max_delay: float,
+    ):
+        self.write = write
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._pending: list[tuple[T, asyncio.Future[R]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._writes: set[asyncio.Task] = set()
+        self._closed = False
+
+    async def submit(self, item: T) -> R:
+        if self._closed:
+            raise WriteBufferClosedError("The write buffer is closed")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self.flush)
+
+        # Shielded, so that a cancelled submitter does not cancel the whole batch
+        return await asyncio.shield(future)
+
+    def flush(self):
+        """Start writing the pending items now."""
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._write_batch(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def close(self):
+        self._closed = True
+        self.flush()
+
+        if self._writes:
+            await asyncio.wait(self._writes)
+
+    async def _write_batch(self, batch: list[tuple[T, asyncio.Future[R]]]):
+        try:
+            results = await self.write([item for item, _ in batch])
+        except BaseException as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return
+
+        for (_, future), result in zip(batch, results, strict=True):
+            if not future.done():
+                future.set_result(result)
@@ -1,2 +1,6 @@
-from .access_log import AccessLogMiddleware
-from .db import DBSessionMiddleware
+from .access_log import AccessLogHook, AccessLogMiddleware
+from .admission import AdmissionControlHook, AdmissionControlMiddleware
+from .cors import CORSHook, CORSMiddleware
+from .db import DBSessionHook, DBSessionMiddleware
+from .metrics import MetricsHook, MetricsMiddleware
+from .pipeline import MiddlewarePipeline, PipelineHook, RequestContext
@@ -7,48 +7,56 @@ with some modifications
 import http
 import logging
 import os
-import sys
+import re
 import time
 import urllib.parse
-from typing import TYPE_CHECKING, TypedDict
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING, Any, TypedDict
+
+from main.libs.log import create_log_handler
+from main.libs.query_stats import QueryStats, query_stats_context
+
+from .pipeline import MiddlewarePipeline, PipelineHook, RequestContext
 
 if TYPE_CHECKING:
     from asgiref.typing import (
         ASGI3Application,
-        ASGIReceiveCallable,
-        ASGISendCallable,
-        ASGISendEvent,
+        HTTPResponseStartEvent,
         HTTPScope,
     )
 
 
 class AccessInfo(TypedDict, total=False):
-    response: "ASGISendEvent"
+    response: "HTTPResponseStartEvent"
     start_time: float
     end_time: float
+    query_stats: QueryStats
+
+
+AtomGetter = Callable[["HTTPScope", AccessInfo], Any]
 
 
-class AccessLogMiddleware:
+class AccessLogHook(PipelineHook):
     # 127.0.0.6 - - [2023-06-16 05:20:48,983] "GET /ready HTTP/1.1"
-    # 200 2 "-" "kube-probe/1.22+" "1.2.3.4" 0.002
+    # 200 2 "-" "kube-probe/1.22+" "1.2.3.4" 0.002 0 0.000
     DEFAULT_FORMAT = (
         '%(h)s %(l)s %(u)s %(t)s "%(R)s" '
-        '%(s)d %(B)s "%(f)s" "%(a)s" "%(x_forwarded_for)s" %(L).3f'
+        '%(s)d %(B)s "%(f)s" "%(a)s" "%(x_forwarded_for)s" %(L).3f '
+        "%(query_count)d %(query_time).3f"
     )
 
     def __init__(
         self,
-        app: "ASGI3Application",
         log_format: str | None = None,
         logger: logging.Logger | None = None,
     ):
-        self.app = app
         self.format = log_format or self.DEFAULT_FORMAT
+        self.formatter = AccessLogFormatter(self.format)
 
         if logger is None:
             self.logger = logging.getLogger("http.access")
             self.logger.setLevel(logging.INFO)
-            handler = logging.StreamHandler(sys.stdout)
+            handler = create_log_handler()
             handler.setLevel(logging.INFO)
             handler.setFormatter(logging.Formatter("%(message)s"))
             self.logger.addHandler(handler)
@@ -58,111 +66,205 @@ class AccessLogMiddleware:
         uvicorn_logger = logging.getLogger("uvicorn.access")
         uvicorn_logger.disabled = True
 
-    async def __call__(
+    async def on_request(self, context: RequestContext):
+        # The response is replaced when it starts, unless the request fails before
+        info = AccessInfo(
+            response={
+                "type": "http.response.start",
+                "status": 500,
+                "headers": [],
+                "trailers": False,
+            },
+            query_stats=QueryStats(),
+        )
+        token = query_stats_context.set(info["query_stats"])
+        context.state["access_log"] = (info, token)
+        info["start_time"] = time.time()
+
+    def on_response_start(
         self,
-        scope: "HTTPScope",
-        receive: "ASGIReceiveCallable",
-        send: "ASGISendCallable",
+        context: RequestContext,
+        message: "HTTPResponseStartEvent",
     ):
-        if scope["type"] != "http":
-            await self.app(scope, receive, send)  # pragma: no cover
-            return
+        info, _ = context.state["access_log"]
+        info["response"] = message
 
-        info = AccessInfo(response={})
+    async def on_finish(self, context: RequestContext):
+        info, token = context.state["access_log"]
+        if context.exception is not None:
+            info["response"]["status"] = 500
 
-        async def wrapped_send(message: "ASGISendEvent"):
-            if message["type"] == "http.response.start":
-                info["response"] = message
+        info["end_time"] = time.time()
+        query_stats_context.reset(token)
+        self.log(context.scope, info)
 
-            await send(message)
+    def log(self, scope: "HTTPScope", info: AccessInfo):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(self.format, self.formatter(scope, info))
 
-        try:
-            info["start_time"] = time.time()
-            await self.app(scope, receive, wrapped_send)
-        except:
-            info["response"]["status"] = 500
-            raise
-        finally:
-            info["end_time"] = time.time()
-            self.log(scope, info)
 
-    def log(self, scope: "HTTPScope", info: AccessInfo):
-        self.logger.info(self.format, AccessLogAtoms(scope, info))
-
-
-class AccessLogAtoms(dict):
-    def __init__(self, scope: "HTTPScope", info: AccessInfo):
-        super().__init__()
-
-        for name, value in scope["headers"]:
-            self[f"{{{name.decode('latin1').lower()}}}i"] = value.decode("latin1")
-        for name, value in info["response"].get("headers", []):
-            self[f"{{{name.decode('latin1').lower()}}}o"] = value.decode("latin1")
-        for name, value in os.environ.items():
-            self[f"{{{name.lower()!r}}}e"] = value
-
-        protocol = f"HTTP/{scope['http_version']}"
-
-        status = info["response"]["status"]
-        try:
-            status_phrase = http.HTTPStatus(status).phrase
-        except ValueError:
-            status_phrase = "-"
-
-        path = scope["root_path"] + scope["path"]
-        full_path = get_path_with_query_string(scope)
-        request_line = f"{scope['method']} {path} {protocol}"
-        full_request_line = f"{scope['method']} {full_path} {protocol}"
-
-        request_time = info["end_time"] - info["start_time"]
-        client_host = scope["client"][0]
-        client_addr = get_client_addr(scope)
-        self.update(
-            {
-                "h": client_host,
-                "client_addr": client_addr,
-                "l": "-",
-                "u": "-",  # Not available on ASGI.
-                "t": time.strftime("[%d/%b/%Y:%H:%M:%S %z]"),
-                "r": request_line,
-                "request_line": full_request_line,
-                "R": full_request_line,
-                "m": scope["method"],
-                "U": scope["path"],
-                "q": scope["query_string"].decode(),
-                "H": protocol,
-                "s": status,
-                "status_code": f"{status} {status_phrase}",
-                "st": status_phrase,
-                "B": self["{Content-Length}o"],
-                "b": self.get("{Content-Length}o", "-"),
-                "f": self["{Referer}i"],
-                "a": self["{User-Agent}i"],
-                "T": int(request_time),
-                "M": int(request_time * 1_000),
-                "D": int(request_time * 1_000_000),
-                "L": request_time,
-                "p": f"<{os.getpid()}>",
-                "x_forwarded_for": get_x_forwarded_for(scope) or "-",
-            },
-        )
+class AccessLogMiddleware(MiddlewarePipeline):
+    DEFAULT_FORMAT = AccessLogHook.DEFAULT_FORMAT
+
+    def __init__(
+        self,
+        app: "ASGI3Application",
+        log_format: str | None = None,
+        logger: logging.Logger | None = None,
+    ):
+        super().__init__(app, [AccessLogHook(log_format, logger)])
+
+
+class AccessLogFormatter:
+    """
+    Compile an access log format into the list of atoms it references.
+
+    The format is parsed only once, so that on every request only the atoms
+    used by the format are computed. Environment atoms (``%({NAME}e)s``) are
+    snapshotted when the formatter is created.
+    """
+
+    _ATOM_PATTERN = re.compile(r"%\(([^)]+)\)")
+    _HEADER_ATOM_PATTERN = re.compile(r"^\{([^}]+)\}([ioe])$")
+
+    def __init__(self, log_format: str):
+        self.format = log_format
+        self.atoms = dict.fromkeys(self._ATOM_PATTERN.findall(log_format))
+        self._getters = [(atom, self._compile_atom(atom)) for atom in self.atoms]
+
+    def __call__(self, scope: "HTTPScope", info: AccessInfo) -> dict:
+        return {atom: getter(scope, info) for atom, getter in self._getters}
 
-    def __getitem__(self, key: str) -> str:
-        try:
-            if key.startswith("{"):
-                return super().__getitem__(key.lower())
+    def _compile_atom(self, atom: str) -> AtomGetter:
+        if match := self._HEADER_ATOM_PATTERN.match(atom):
+            name, kind = match.groups()
+            if kind == "e":
+                value = _environ_snapshot().get(name.lower(), "-")
+                return lambda *_: value
 
-            return super().__getitem__(key)
-        except KeyError:
-            return "-"
+            header_name = name.lower().encode("latin1")
+            if kind == "i":
+                return lambda scope, _: get_header(scope["headers"], header_name)
+            return lambda _, info: get_header(
+                info["response"].get("headers", []),
+                header_name,
+            )
+
+        return _ATOM_GETTERS.get(atom, _get_missing)
+
+
+def _environ_snapshot() -> dict[str, str]:
+    return {name.lower(): value for name, value in os.environ.items()}
+
+
+def _get_missing(*_) -> str:
+    return "-"
+
+
+def _get_protocol(scope: "HTTPScope", _: AccessInfo | None = None) -> str:
+    return f"HTTP/{scope['http_version']}"
+
+
+def _get_status(_: "HTTPScope", info: AccessInfo) -> int:
+    return info["response"]["status"]
+
+
+def _get_status_phrase(_: "HTTPScope", info: AccessInfo) -> str:
+    try:
+        return http.HTTPStatus(info["response"]["status"]).phrase
+    except ValueError:
+        return "-"
+
+
+def _get_status_code(scope: "HTTPScope", info: AccessInfo) -> str:
+    return f"{_get_status(scope, info)} {_get_status_phrase(scope, info)}"
+
+
+def _get_request_line(scope: "HTTPScope", _: AccessInfo) -> str:
+    path = scope["root_path"] + scope["path"]
+    return f"{scope['method']} {path} {_get_protocol(scope)}"
+
+
+def _get_full_request_line(scope: "HTTPScope", _: AccessInfo) -> str:
+    full_path = get_path_with_query_string(scope)
+    return f"{scope['method']} {full_path} {_get_protocol(scope)}"
+
+
+def _get_request_time(_: "HTTPScope", info: AccessInfo) -> float:
+    return info["end_time"] - info["start_time"]
+
+
+def _get_content_length(_: "HTTPScope", info: AccessInfo) -> str:
+    return get_header(info["response"].get("headers", []), b"content-length")
+
+
+_last_formatted_time: tuple[int, str] = (0, "")
+
+
+def _get_formatted_time(_: "HTTPScope", info: AccessInfo) -> str:
+    # time.strftime only has a precision of one second, so its result is cached
+    # for the current second instead of being recomputed on every request
+    global _last_formatted_time
+
+    second = int(info["end_time"])
+    if _last_formatted_time[0] != second:
+        formatted_time = time.strftime(
+            "[%d/%b/%Y:%H:%M:%S %z]",
+            time.localtime(second),
+        )
+        _last_formatted_time = (second, formatted_time)
+
+    return _last_formatted_time[1]
+
+
+_ATOM_GETTERS: dict[str, AtomGetter] = {
+    "h": lambda scope, _: scope["client"][0] if scope["client"] else "-",
+    "client_addr": lambda scope, _: get_client_addr(scope),
+    "l": _get_missing,
+    "u": _get_missing,  # Not available on ASGI.
+    "t": _get_formatted_time,
+    "r": _get_request_line,
+    "request_line": _get_full_request_line,
+    "R": _get_full_request_line,
+    "m": lambda scope, _: scope["method"],
+    "U": lambda scope, _: scope["path"],
+    "q": lambda scope, _: scope["query_string"].decode(),
+    "H": _get_protocol,
+    "s": _get_status,
+    "status_code": _get_status_code,
+    "st": _get_status_phrase,
+    "B": _get_content_length,
+    "b": _get_content_length,
+    "f": lambda scope, _: get_header(scope["headers"], b"referer"),
+    "a": lambda scope, _: get_header(scope["headers"], b"user-agent"),
+    "T": lambda scope, info: int(_get_request_time(scope, info)),
+    "M": lambda scope, info: int(_get_request_time(scope, info) * 1_000),
+    "D": lambda scope, info: int(_get_request_time(scope, info) * 1_000_000),
+    "L": _get_request_time,
+    "p": lambda *_: f"<{os.getpid()}>",
+    "x_forwarded_for": lambda scope, _: get_x_forwarded_for(scope) or "-",
+    "query_count": lambda _, info: info["query_stats"].count,
+    "query_time": lambda _, info: info["query_stats"].duration,
+}
+
+
+def get_header(
+    headers: Iterable[tuple[bytes, bytes]],
+    name: bytes,
+    default: Any = "-",
+) -> Any:
+    for header_name, value in headers:
+        if header_name.lower() == name:
+            return value.decode("latin1")
+
+    return default
 
 
 def get_x_forwarded_for(scope: "HTTPScope") -> str | None:
-    headers = dict(scope["headers"])
-    if b"x-forwarded-for" not in headers:
+    x_forwarded_for = get_header(scope["headers"], b"x-forwarded-for", None)
+    if x_forwarded_for is None:
         return None
 
-    x_forwarded_for = headers[b"x-forwarded-for"].decode("latin1")
     x_forwarded_for_hosts = [item.strip() for item in x_forwarded_for.split(",")]
 
     return x_forwarded_for_hosts[-1] if x_forwarded_for_hosts else None
@@ -0,0 +1,212 @@
+import asyncio
+import time
+from collections.abc import Mapping, Sequence
+from typing import TYPE_CHECKING
+
+from main._db import db
+from main.commons.exceptions import ServiceUnavailable
+from main.libs.metrics import metrics
+
+from .pipeline import MiddlewarePipeline, PipelineHook, RequestContext
+
+if TYPE_CHECKING:
+    from asgiref.typing import ASGI3Application, HTTPResponseStartEvent
+    from starlette.responses import Response
+
+http_requests_rejected_total = metrics.counter(
+    "http_requests_rejected_total",
+    "Total number of HTTP requests rejected by the admission control.",
+    ("reason",),
+)
+
+
+class RejectionReason:
+    CONCURRENCY = "concurrency"
+    DB_POOL = "db_pool"
+    LATENCY = "latency"
+
+
+class ConcurrencyLimiter:
+    """
+    Allow ``limit`` concurrent holders. Once they are all taken, up to
+    ``queue_size`` callers wait at most ``queue_timeout`` seconds for one, and the
+    others are turned away immediately.
+    """
+
+    def __init__(self, limit: int, queue_size: int, queue_timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> bool:
+        if not self._semaphore.locked():
+            # Does not suspend, since a slot is free
+            await self._semaphore.acquire()
+            return True
+
+        if self.waiting >= self.queue_size:
+            return False
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+
+        return True
+
+    def release(self):
+        self._semaphore.release()
+
+
+class AdmissionControlHook(PipelineHook):
+    """
+    Cap the in-flight requests, globally and per path, and shed the load early
+    with a 503 and a ``Retry-After`` header when the service is saturated: when
+    too many requests are waiting for a DB connection, or when the average
+    latency is too high.
+
+    The latency is a moving average of the time until the admitted requests start
+    responding, so that a streamed response, e.g. an export, only counts until its
+    first byte. While it is above the maximum, a request is still admitted when no
+    other is waiting for its response, so that the average recovers once the load
+    drops.
+
+    Placed before ``DBSessionHook``, rejected requests never open a DB scope.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int | None = None,
+        path_limits: Mapping[str, int] | None = None,
+        queue_size: int = 100,
+        queue_timeout: float = 0.5,
+        max_pending_pool_checkouts: int | None = None,
+        max_latency: float | None = None,
+        latency_smoothing: float = 0.1,
+        retry_after: int = 1,
+        exempt_paths: Sequence[str] = (),
+    ):
+        self.limiter = (
+            ConcurrencyLimiter(max_in_flight, queue_size, queue_timeout)
+            if max_in_flight is not None
+            else None
+        )
+        # The requests are not routed yet, so the limits apply to exact paths
+        self.path_limiters = {
+            path: ConcurrencyLimiter(limit, queue_size, queue_timeout)
+            for path, limit in (path_limits or {}).items()
+        }
+        self.max_pending_pool_checkouts = max_pending_pool_checkouts
+        self.max_latency = max_latency
+        self.latency_smoothing = latency_smoothing
+        self.retry_after = str(retry_after)
+        self.exempt_paths = set(exempt_paths)
+
+        self.in_flight = 0
+        # The admitted requests which did not start responding yet
+        self.awaiting_response = 0
+        self.latency = 0.0
+
+    async def on_request(self, context: RequestContext):
+        path = context.scope["path"]
+        if path in self.exempt_paths:
+            return None
+
+        reason = self.get_shedding_reason()
+        if reason is not None:
+            return self.reject(reason)
+
+        limiters: list[ConcurrencyLimiter] = []
+        for limiter in (self.limiter, self.path_limiters.get(path)):
+            if limiter is None:
+                continue
+
+            if not await self._acquire(limiter, limiters):
+                return self.reject(RejectionReason.CONCURRENCY)
+            limiters.append(limiter)
+
+        self.in_flight += 1
+        self.awaiting_response += 1
+        context.state["admission"] = limiters
+        context.state["admission_start_time"] = time.perf_counter()
+        return None
+
+    def on_response_start(
+        self,
+        context: RequestContext,
+        message: "HTTPResponseStartEvent",
+    ):
+        self._record_latency(context)
+
+    async def on_finish(self, context: RequestContext):
+        limiters = context.state.get("admission")
+        if limiters is None:
+            return
+
+        for limiter in limiters:
+            limiter.release()
+
+        self.in_flight -= 1
+        # Failed before responding
+        self._record_latency(context)
+
+    def _record_latency(self, context: RequestContext):
+        start_time = context.state.pop("admission_start_time", None)
+        if start_time is None:
+            return
+
+        self.awaiting_response -= 1
+        self.latency += self.latency_smoothing * (
+            time.perf_counter() - start_time - self.latency
+        )
+
+    def get_shedding_reason(self) -> str | None:
+        if (
+            self.max_pending_pool_checkouts is not None
+            and db.pending_pool_checkouts >= self.max_pending_pool_checkouts
+        ):
+            return RejectionReason.DB_POOL
+
+        if (
+            self.max_latency is not None
+            and self.latency > self.max_latency
+            and self.awaiting_response
+        ):
+            return RejectionReason.LATENCY
+
+        return None
+
+    def reject(self, reason: str) -> "Response":
+        http_requests_rejected_total.inc((reason,))
+
+        response = ServiceUnavailable(error_data={"reason": reason}).to_response()
+        response.headers["Retry-After"] = self.retry_after
+        return response
+
+    @staticmethod
+    async def _acquire(
+        limiter: ConcurrencyLimiter,
+        acquired: list[ConcurrencyLimiter],
+    ) -> bool:
+        """Acquire ``limiter``, or release the ``acquired`` ones on failure."""
+
+        # Also released if the request is cancelled while waiting in the queue
+        admitted = False
+        try:
+            admitted = await limiter.acquire()
+        finally:
+            if not admitted:
+                for acquired_limiter in acquired:
+                    acquired_limiter.release()
+
+        return admitted
+
+
+class AdmissionControlMiddleware(MiddlewarePipeline):
+    def __init__(self, app: "ASGI3Application", **options):
+        super().__init__(app, [AdmissionControlHook(**options)])
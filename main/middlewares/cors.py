@@ -0,0 +1,187 @@
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+from starlette.responses import Response
+
+from .pipeline import MiddlewarePipeline, PipelineHook, RequestContext
+
+if TYPE_CHECKING:
+    from asgiref.typing import ASGI3Application, HTTPResponseStartEvent, HTTPScope
+
+ALL_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+SAFELISTED_HEADERS = {"Accept", "Accept-Language", "Content-Language", "Content-Type"}
+
+_VARY_ORIGIN = (b"vary", b"Origin")
+
+
+class CORSHook(PipelineHook):
+    """
+    Pure ASGI equivalent of the CORS middleware of Starlette.
+
+    The response headers are built once, when the hook is created, so that a
+    request only copies them, and preflight requests are answered without reaching
+    the application. Requests without an ``Origin`` header are passed through
+    untouched.
+    """
+
+    def __init__(
+        self,
+        allow_origins: Sequence[str] = (),
+        allow_methods: Sequence[str] = ("GET",),
+        allow_headers: Sequence[str] = (),
+        allow_credentials: bool = False,
+        expose_headers: Sequence[str] = (),
+        max_age: int = 600,
+    ):
+        self.allow_all_origins = "*" in allow_origins
+        self.allow_all_headers = "*" in allow_headers
+        self.allow_origins = {origin.encode("latin-1") for origin in allow_origins}
+        self.allow_methods = ALL_METHODS if "*" in allow_methods else allow_methods
+        allow_headers = sorted(SAFELISTED_HEADERS | set(allow_headers))
+        self.allow_headers = {header.lower() for header in allow_headers}
+        self.allow_credentials = allow_credentials
+        # With credentials, browsers reject a wildcard origin in a preflight
+        # response, so the request origin is echoed instead
+        self.preflight_explicit_origin = (
+            not self.allow_all_origins or self.allow_credentials
+        )
+
+        simple_headers = []
+        if self.allow_all_origins:
+            simple_headers.append((b"access-control-allow-origin", b"*"))
+        if allow_credentials:
+            simple_headers.append((b"access-control-allow-credentials", b"true"))
+        if expose_headers:
+            simple_headers.append(
+                (
+                    b"access-control-expose-headers",
+                    ", ".join(expose_headers).encode("latin-1"),
+                ),
+            )
+        self.simple_headers = simple_headers
+
+        preflight_headers = [
+            (b"access-control-allow-methods", ", ".join(self.allow_methods).encode()),
+            (b"access-control-max-age", str(max_age).encode()),
+        ]
+        if not self.allow_all_headers:
+            preflight_headers.append(
+                (
+                    b"access-control-allow-headers",
+                    ", ".join(allow_headers).encode("latin-1"),
+                ),
+            )
+        if allow_credentials:
+            preflight_headers.append((b"access-control-allow-credentials", b"true"))
+        if self.preflight_explicit_origin:
+            preflight_headers.append(_VARY_ORIGIN)
+        else:
+            preflight_headers.append((b"access-control-allow-origin", b"*"))
+        self.preflight_headers = preflight_headers
+
+    async def on_request(self, context: RequestContext):
+        scope = context.scope
+        origin, request_method, has_cookie = _get_cors_request_headers(scope)
+
+        if origin is None:
+            return None
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            return self.preflight_response(scope, origin, request_method)
+
+        context.state["cors"] = self.get_simple_headers(origin, has_cookie)
+        return None
+
+    def on_response_start(
+        self,
+        context: RequestContext,
+        message: "HTTPResponseStartEvent",
+    ):
+        headers = context.state.get("cors")
+        if headers is not None:
+            message["headers"] = [*message.get("headers", ()), *headers]
+
+    def get_simple_headers(
+        self,
+        origin: bytes,
+        has_cookie: bool,
+    ) -> list[tuple[bytes, bytes]]:
+        headers = list(self.simple_headers)
+
+        if self.allow_all_origins:
+            # Cookies can only be sent back with an explicit origin
+            if has_cookie:
+                headers[0] = (b"access-control-allow-origin", origin)
+                headers.append(_VARY_ORIGIN)
+        elif origin in self.allow_origins:
+            headers.append((b"access-control-allow-origin", origin))
+            headers.append(_VARY_ORIGIN)
+
+        return headers
+
+    def preflight_response(
+        self,
+        scope: "HTTPScope",
+        origin: bytes,
+        request_method: bytes,
+    ) -> Response:
+        headers = list(self.preflight_headers)
+        failures = []
+
+        if not self.allow_all_origins and origin not in self.allow_origins:
+            failures.append("origin")
+        elif self.preflight_explicit_origin:
+            headers.append((b"access-control-allow-origin", origin))
+
+        if request_method.decode("latin-1") not in self.allow_methods:
+            failures.append("method")
+
+        requested_headers = b", ".join(
+            value
+            for name, value in scope["headers"]
+            if name == b"access-control-request-headers"
+        )
+        if self.allow_all_headers and requested_headers:
+            headers.append((b"access-control-allow-headers", requested_headers))
+        elif requested_headers:
+            for header in requested_headers.decode("latin-1").split(","):
+                if header.strip().lower() not in self.allow_headers:
+                    failures.append("headers")
+                    break
+
+        if failures:
+            status = 400
+            body = f"Disallowed CORS {', '.join(failures)}".encode()
+        else:
+            status = 200
+            body = b"OK"
+
+        headers.append((b"content-length", str(len(body)).encode()))
+        headers.append((b"content-type", b"text/plain; charset=utf-8"))
+
+        response = Response(body, status)
+        response.raw_headers = headers
+        return response
+
+
+class CORSMiddleware(MiddlewarePipeline):
+    def __init__(self, app: "ASGI3Application", **options):
+        super().__init__(app, [CORSHook(**options)])
+
+
+def _get_cors_request_headers(
+    scope: "HTTPScope",
+) -> tuple[bytes | None, bytes | None, bool]:
+    origin = None
+    request_method = None
+    has_cookie = False
+
+    for name, value in scope["headers"]:
+        if name == b"origin":
+            origin = value
+        elif name == b"access-control-request-method":
+            request_method = value
+        elif name == b"cookie":
+            has_cookie = True
+
+    return origin, request_method, has_cookie
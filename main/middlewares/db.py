@@ -1,29 +1,124 @@
+import asyncio
 from typing import TYPE_CHECKING
 
+from main._config import config
+from main._db import db
+from main.libs.deadline import Deadline
+
+from .pipeline import MiddlewarePipeline, PipelineHook, RequestContext
+
 if TYPE_CHECKING:
     from asgiref.typing import (
         ASGI3Application,
         ASGIReceiveCallable,
-        ASGISendCallable,
-        HTTPScope,
+        ASGIReceiveEvent,
     )
 
 
-class DBSessionMiddleware:
+class DisconnectWatcher:
+    """
+    Cancel ``deadline`` as soon as the client disconnects, even while the
+    application is not reading the request messages.
+
+    The messages are passed through to the application, until ``start`` is
+    called, e.g. by the first statement: the messages are then read in the
+    background, and the application receives them through ``receive``. At most
+    one message is read ahead, so that the request body is still read at the pace
+    of the application. Requests which never reach the database do not pay for a
+    background task.
+
+    Once the response is sent, ``complete`` stops watching: the server then
+    reports the client as disconnected, though it did not abort the request, e.g.
+    while the background tasks of the response run.
+    """
+
+    def __init__(self, receive: "ASGIReceiveCallable", deadline: Deadline):
+        self._receive = receive
+        self.deadline = deadline
+        self._messages: asyncio.Queue[ASGIReceiveEvent] | None = None
+        self._disconnect: ASGIReceiveEvent | None = None
+        self._task: asyncio.Task | None = None
+        # Whether the application is waiting for a message, passed through
+        self._receiving = False
+        self._completed = False
+
+    def start(self):
+        # An application already waiting for a message sees the disconnection
+        if self._task is None and not self._receiving and self._disconnect is None:
+            self._messages = asyncio.Queue(maxsize=1)
+            self._task = asyncio.create_task(self._run(self._messages))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def complete(self):
+        self._completed = True
+        self.stop()
+
+    async def receive(self) -> "ASGIReceiveEvent":
+        # Once completed, the messages left are read from the server again
+        if self._messages is None or (self._completed and self._messages.empty()):
+            self._receiving = True
+            try:
+                message = await self._receive()
+            finally:
+                self._receiving = False
+
+            self._check(message)
+            return message
+
+        # Once disconnected, the application can keep receiving the disconnection
+        if self._disconnect is not None and self._messages.empty():
+            return self._disconnect
+
+        return await self._messages.get()
+
+    async def _run(self, messages: "asyncio.Queue[ASGIReceiveEvent]"):
+        while self._disconnect is None:
+            message = await self._receive()
+            self._check(message)
+            await messages.put(message)
+
+    def _check(self, message: "ASGIReceiveEvent"):
+        if message["type"] == "http.disconnect" and not self._completed:
+            self._disconnect = message
+            self.deadline.cancel()
+
+
+class DBSessionHook(PipelineHook):
+    """
+    Run the request in a database scope, whose statements are cancelled after
+    ``SQLALCHEMY_REQUEST_DEADLINE`` seconds, or when the client disconnects with
+    ``SQLALCHEMY_CANCEL_ON_DISCONNECT``.
+    """
+
+    async def on_request(self, context: RequestContext):
+        deadline = watcher = None
+        if config.SQLALCHEMY_CANCEL_ON_DISCONNECT:
+            deadline = Deadline(config.SQLALCHEMY_REQUEST_DEADLINE)
+            watcher = DisconnectWatcher(context.receive, deadline)
+            deadline.on_enforce = watcher.start
+            context.receive = watcher.receive
+        elif config.SQLALCHEMY_REQUEST_DEADLINE is not None:
+            deadline = Deadline(config.SQLALCHEMY_REQUEST_DEADLINE)
+
+        token = db.enter_scope(lazy=config.SQLALCHEMY_LAZY_SESSION, deadline=deadline)
+        context.state["db"] = (token, watcher)
+
+    def on_response_end(self, context: RequestContext):
+        _, watcher = context.state["db"]
+        if watcher is not None:
+            watcher.complete()
+
+    async def on_finish(self, context: RequestContext):
+        token, watcher = context.state["db"]
+        if watcher is not None:
+            watcher.stop()
+
+        await db.exit_scope(token)
+
+
+class DBSessionMiddleware(MiddlewarePipeline):
     def __init__(self, app: "ASGI3Application"):
-        self.app = app
-
-    async def __call__(
-        self,
-        scope: "HTTPScope",
-        receive: "ASGIReceiveCallable",
-        send: "ASGISendCallable",
-    ):
-        if scope["type"] != "http":
-            await self.app(scope, receive, send)  # pragma: no cover
-            return
-
-        from main import db
-
-        async with db.scope():
-            await self.app(scope, receive, send)
+        super().__init__(app, [DBSessionHook()])
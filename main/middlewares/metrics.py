@@ -0,0 +1,49 @@
+import time
+from typing import TYPE_CHECKING
+
+from main.libs.metrics import metrics
+
+from .pipeline import MiddlewarePipeline, PipelineHook, RequestContext
+
+if TYPE_CHECKING:
+    from asgiref.typing import ASGI3Application
+
+http_requests_total = metrics.counter(
+    "http_requests_total",
+    "Total number of HTTP requests.",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency in seconds.",
+    ("method", "route"),
+)
+
+UNMATCHED_ROUTE = "unmatched"
+STATUS_CLASSES = {status: f"{status // 100}xx" for status in range(100, 600)}
+
+
+class MetricsHook(PipelineHook):
+    """Record the count, status class and latency of requests, per route."""
+
+    async def on_request(self, context: RequestContext):
+        context.state["metrics"] = time.perf_counter()
+
+    async def on_finish(self, context: RequestContext):
+        duration = time.perf_counter() - context.state["metrics"]
+        status = context.response["status"] if context.response is not None else 500
+
+        # The router stores the matched route in the scope
+        scope = context.scope
+        route_path = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+        method = scope["method"]
+
+        http_requests_total.inc(
+            (method, route_path, STATUS_CLASSES.get(status, "other")),
+        )
+        http_request_duration_seconds.observe(duration, (method, route_path))
+
+
+class MetricsMiddleware(MiddlewarePipeline):
+    def __init__(self, app: "ASGI3Application"):
+        super().__init__(app, [MetricsHook()])
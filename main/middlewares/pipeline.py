@@ -0,0 +1,163 @@
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from asgiref.typing import (
+        ASGI3Application,
+        ASGIReceiveCallable,
+        ASGISendCallable,
+        ASGISendEvent,
+        HTTPResponseStartEvent,
+        HTTPScope,
+    )
+
+
+class RequestContext:
+    """The state of a request, shared by the hooks of a pipeline."""
+
+    __slots__ = ("scope", "receive", "response", "exception", "state", "started")
+
+    def __init__(self, scope: "HTTPScope", receive: "ASGIReceiveCallable"):
+        self.scope = scope
+        # The receive channel passed to the application, which hooks can wrap
+        self.receive = receive
+        # The http.response.start message, once sent
+        self.response: HTTPResponseStartEvent | None = None
+        # The exception raised by the application, if any
+        self.exception: BaseException | None = None
+        # Data kept by the hooks between their calls, by hook
+        self.state: dict[str, Any] = {}
+        # Number of hooks whose on_request was called
+        self.started = 0
+
+
+class PipelineHook:
+    """
+    A middleware concern, run by ``MiddlewarePipeline``. All the methods are
+    optional.
+    """
+
+    async def on_request(self, context: RequestContext) -> "ASGI3Application | None":
+        """
+        Called before the application. Returning an ASGI application, e.g. a
+        response, serves it instead, and skips the next hooks.
+        """
+
+    def on_response_start(
+        self,
+        context: RequestContext,
+        message: "HTTPResponseStartEvent",
+    ):
+        """Called before the response start is sent, the message can be changed."""
+
+    def on_response_end(self, context: RequestContext):
+        """
+        Called before the final body of the response is sent, after which the
+        server reports the client as disconnected, e.g. while background tasks run.
+        """
+
+    async def on_finish(self, context: RequestContext):
+        """Called once the response is sent, or the application failed."""
+
+
+class MiddlewarePipeline:
+    """
+    Run several middleware concerns as a single ASGI middleware, with a single
+    ``send`` wrapper, instead of nesting one middleware per concern.
+
+    The hooks behave as if they were nested middlewares, the first one being the
+    outermost: ``on_request``, ``on_response_start`` and ``on_response_end`` are
+    called in order, and ``on_finish`` in reverse order, only for the hooks whose
+    ``on_request`` was called, even if another ``on_finish`` fails.
+    """
+
+    def __init__(self, app: "ASGI3Application", hooks: Sequence[PipelineHook]):
+        self.app = app
+        self.hooks = list(hooks)
+        # The hooks not overriding a method are skipped when calling it
+        self._request_hooks = _overriding(self.hooks, "on_request")
+        self._response_start_hooks = _overriding(self.hooks, "on_response_start")
+        self._response_end_hooks = _overriding(self.hooks, "on_response_end")
+        self._finish_hooks = [hook for _, hook in _overriding(self.hooks, "on_finish")]
+
+    async def __call__(
+        self,
+        scope: "HTTPScope",
+        receive: "ASGIReceiveCallable",
+        send: "ASGISendCallable",
+    ):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)  # pragma: no cover
+            return
+
+        context = RequestContext(scope, receive)
+
+        async def wrapped_send(message: "ASGISendEvent"):
+            self._on_send(context, message)
+            await send(message)
+
+        try:
+            response = await self._start(context)
+            app = self.app if response is None else response
+            await app(scope, context.receive, wrapped_send)
+        except BaseException as e:
+            context.exception = e
+            raise
+        finally:
+            finish_hooks = self._finish_hooks
+            if context.started < len(self.hooks):
+                finish_hooks = [
+                    hook
+                    for _, hook in _overriding(
+                        self.hooks[: context.started],
+                        "on_finish",
+                    )
+                ]
+            await _finish(finish_hooks, len(finish_hooks), context)
+
+    def _on_send(self, context: RequestContext, message: "ASGISendEvent"):
+        if message["type"] == "http.response.start":
+            context.response = message
+            for index, hook in self._response_start_hooks:
+                if index < context.started:
+                    hook.on_response_start(context, message)
+        elif message["type"] == "http.response.body" and not message.get(
+            "more_body",
+        ):
+            for index, hook in self._response_end_hooks:
+                if index < context.started:
+                    hook.on_response_end(context)
+
+    async def _start(self, context: RequestContext) -> "ASGI3Application | None":
+        for index, hook in self._request_hooks:
+            # If on_request fails, the hook is not started
+            context.started = index
+            response = await hook.on_request(context)
+            if response is not None:
+                context.started = index + 1
+                return response
+
+        context.started = len(self.hooks)
+        return None
+
+
+def _overriding(hooks: list[PipelineHook], name: str) -> list[tuple[int, PipelineHook]]:
+    default = getattr(PipelineHook, name)
+    return [
+        (index, hook)
+        for index, hook in enumerate(hooks)
+        if getattr(type(hook), name) is not default
+    ]
+
+
+async def _finish(hooks: list[PipelineHook], count: int, context: RequestContext):
+    """Call on_finish of the first ``count`` hooks, in reverse order."""
+
+    try:
+        while count:
+            count -= 1
+            await hooks[count].on_finish(context)
+    finally:
+        # The hooks left after a failure are finished too
+        if count:
+            await _finish(hooks, count, context)
@@ -1,7 +1,33 @@
 from datetime import datetime
+from functools import cache
+from typing import Any
 
-from sqlalchemy import JSON, MetaData
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Computed,
+    Float,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    column,
+)
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    InstrumentedAttribute,
+    Mapped,
+    MappedColumn,
+    mapped_column,
+)
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.elements import ColumnElement, TypeClause
+from sqlalchemy.types import TypeEngine
+
+# Key of the column info of the generated columns, holding (JSON column name, key)
+JSON_PATH_INFO = "json_path"
 
 
 class BaseModel(DeclarativeBase):
@@ -30,3 +56,107 @@ class TimestampMixin:
         onupdate=datetime.utcnow,
         nullable=False,
     )
+
+
+def json_value(json_column: Any, key: str, type_: TypeEngine) -> ColumnElement:
+    """The value at ``key`` of a JSON column, converted to ``type_``."""
+
+    element = json_column[key]
+    if isinstance(type_, Boolean):
+        return element.as_boolean()
+    if isinstance(type_, Integer):
+        return element.as_integer()
+    if isinstance(type_, Float | Numeric):
+        return element.as_float()
+    return element.as_string()
+
+
+class json_path_value(ColumnElement):
+    """
+    The value at ``key`` of a JSON column, converted to ``type_``, or NULL if it
+    cannot be, e.g. a string for an integer, or a string too long. As the
+    expression of a generated column, a write of such a value then does not fail.
+    """
+
+    inherit_cache = False
+
+    def __init__(self, json_column: Any, key: str, type_: TypeEngine):
+        self.json_column = json_column
+        self.json_key = key
+        self.type = type_
+
+
+@compiles(json_path_value)
+def _compile_json_path_value(
+    element: json_path_value,
+    compiler: SQLCompiler,
+    **kw,
+) -> str:
+    return compiler.process(
+        json_value(element.json_column, element.json_key, element.type),
+        **kw,
+    )
+
+
+@compiles(json_path_value, "mysql")
+def _compile_json_path_value_mysql(
+    element: json_path_value,
+    compiler: SQLCompiler,
+    **kw,
+) -> str:
+    # JSON_VALUE requires MySQL 8.0.21
+    if isinstance(element.type, Boolean):
+        returning = "SIGNED"
+    elif isinstance(element.type, Float):
+        returning = "DOUBLE"
+    else:
+        returning = compiler.process(TypeClause(element.type), **kw)
+
+    path = compiler.render_literal_value(f'$."{element.json_key}"', String())
+    json_column = compiler.process(element.json_column, **kw)
+    return f"JSON_VALUE({json_column}, {path} RETURNING {returning} NULL ON ERROR)"
+
+
+def json_path_column(source: str, key: str, type_: TypeEngine) -> MappedColumn:
+    """
+    A generated column with the value at ``key`` of the JSON column ``source``,
+    NULL if it cannot be converted to ``type_``. The column is virtual, so it
+    takes no space in the rows, but it is indexed, so that filtering on the key
+    with ``json_field`` does not scan the table.
+    """
+
+    return mapped_column(
+        type_,
+        Computed(json_path_value(column(source, JSON()), key, type_), persisted=False),
+        index=True,
+        info={JSON_PATH_INFO: (source, key)},
+    )
+
+
+def json_field(
+    json_column: InstrumentedAttribute,
+    key: str,
+    type_: TypeEngine | None = None,
+) -> ColumnElement:
+    """
+    The value at ``key`` of the JSON column of a model, to filter on. It is read
+    from the indexed column declared with ``json_path_column`` if any, otherwise
+    extracted from every row, as ``type_``, a string by default.
+    """
+
+    path_column = _get_json_path_columns(json_column.class_.__table__).get(
+        (json_column.key, key),
+    )
+    if path_column is not None:
+        return path_column
+
+    return json_value(json_column, key, type_ if type_ is not None else String())
+
+
+@cache
+def _get_json_path_columns(table: Table) -> dict[tuple[str, str], ColumnElement]:
+    return {
+        table_column.info[JSON_PATH_INFO]: table_column
+        for table_column in table.columns
+        if JSON_PATH_INFO in table_column.info
+    }
@@ -1,6 +1,7 @@
+from sqlalchemy import BigInteger, String
 from sqlalchemy.orm import Mapped, mapped_column
 
-from .base import BaseModel
+from .base import BaseModel, json_path_column
 
 
 class ItemModel(BaseModel):
@@ -8,3 +9,12 @@ class ItemModel(BaseModel):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     data: Mapped[dict | None] = mapped_column(nullable=True)
+
+    # The hot keys of data, indexed, to filter on with json_field. Their values are
+    # validated by ItemDataSchema
+    data_category: Mapped[str | None] = json_path_column(
+        "data",
+        "category",
+        String(64),
+    )
+    data_price: Mapped[int | None] = json_path_column("data", "price", BigInteger())
@@ -0,0 +1,139 @@
+"""
+Profile the cold start of the application, in fresh interpreters, so that nothing
+is already imported. Run with ``python -m main profile-startup``.
+"""
+
+import json
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+
+# Run in a fresh interpreter, prints the duration of each startup phase in seconds
+_PHASES_SCRIPT = """
+import asyncio
+import json
+import time
+
+phases = {}
+last_time = start_time = time.perf_counter()
+
+
+def end_phase(name):
+    global last_time
+    now = time.perf_counter()
+    phases[name] = now - last_time
+    last_time = now
+
+
+import fastapi
+import pydantic_settings
+import sqlalchemy.ext.asyncio
+
+end_phase("dependencies")
+
+import main
+
+end_phase("application")
+engine_created_on_import = "engine" in main.db.__dict__
+
+main.db.engine
+
+end_phase("engine")
+
+if LIFESPAN:
+
+    async def run_lifespan():
+        async with main.app.router.lifespan_context(main.app):
+            pass
+
+    asyncio.run(run_lifespan())
+    end_phase("lifespan")
+
+phases["total"] = time.perf_counter() - start_time
+print(json.dumps({"phases": phases, "engine_created": engine_created_on_import}))
+"""
+
+# import time:       self [us] |      cumulative | imported package
+_IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+@dataclass
+class ImportTime:
+    module: str
+    self_time: float
+    cumulative_time: float
+
+
+@dataclass
+class StartupProfile:
+    # Seconds per phase, in order
+    phases: dict[str, float]
+    engine_created_on_import: bool
+    # The imports of ``main``, slowest first
+    imports: list[ImportTime]
+
+
+def profile_startup(lifespan: bool = False) -> StartupProfile:
+    """
+    Measure the startup phases, and the import times of ``main``. Running the
+    lifespan connects to the database, so it is opt-in.
+    """
+
+    script = f"LIFESPAN = {lifespan!r}\n{_PHASES_SCRIPT}"
+    # The commands only run the current interpreter on our own code
+    result = subprocess.run(
+        [sys.executable, "-c", script],  # noqa: S603
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    output = json.loads(result.stdout.splitlines()[-1])
+
+    return StartupProfile(
+        phases=output["phases"],
+        engine_created_on_import=output["engine_created"],
+        imports=profile_imports("main"),
+    )
+
+
+def profile_imports(module: str) -> list[ImportTime]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],  # noqa: S603
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if match := _IMPORT_TIME_PATTERN.match(line):
+            self_us, cumulative_us, _, name = match.groups()
+            imports.append(
+                ImportTime(name, int(self_us) / 1e6, int(cumulative_us) / 1e6),
+            )
+
+    return sorted(imports, key=lambda i: i.cumulative_time, reverse=True)
+
+
+def format_profile(profile: StartupProfile, top: int = 20) -> str:
+    lines = ["Startup phases:"]
+    lines += [
+        f"  {phase:<24} {seconds * 1_000:>9.1f} ms"
+        for phase, seconds in profile.phases.items()
+    ]
+    lines.append(f"  engine created on import: {profile.engine_created_on_import}")
+
+    # The modules of the application and the top-level packages it imports, since
+    # the cumulative times of their submodules are already included
+    imports = [
+        i for i in profile.imports if "." not in i.module or i.module.startswith("main")
+    ]
+    lines.append(f"Slowest imports (top {top}, cumulative / self):")
+    lines += [
+        f"  {i.module:<40} {i.cumulative_time * 1_000:>9.1f} ms"
+        f" {i.self_time * 1_000:>9.1f} ms"
+        for i in imports[:top]
+    ]
+
+    return "\n".join(lines) + "\n"
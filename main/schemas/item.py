@@ -0,0 +1,43 @@
+from pydantic import ConfigDict, Field
+
+from .base import BaseResponseSchema, BaseValidationSchema
+
+BIGINT_MIN = -(2**63)
+BIGINT_MAX = 2**63 - 1
+
+
+class ItemSchema(BaseResponseSchema):
+    id: int
+    data: dict | None
+
+
+class ItemListSchema(BaseResponseSchema):
+    items: list[ItemSchema]
+    next_cursor: int | None
+
+
+class ItemCountSchema(BaseResponseSchema):
+    count: int
+
+
+class ItemIdsSchema(BaseResponseSchema):
+    ids: list[int]
+
+
+class ItemDataSchema(BaseValidationSchema):
+    """
+    The item data, whose hot keys are checked against the types of their indexed
+    columns, see ``ItemModel``. The other keys are kept as is.
+    """
+
+    model_config = ConfigDict(
+        extra="allow",
+        str_strip_whitespace=False,
+    )
+
+    category: str | None = Field(default=None, max_length=64)
+    price: int | None = Field(default=None, strict=True, ge=BIGINT_MIN, le=BIGINT_MAX)
+
+
+class ItemCreateSchema(BaseValidationSchema):
+    data: ItemDataSchema | None = None
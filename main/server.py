@@ -0,0 +1,209 @@
+"""
+Production server: uvicorn workers supervised by a parent process, configured by
+the ``SERVER_*`` settings. Run with ``python -m main serve``.
+"""
+
+import copy
+import multiprocessing
+import os
+import secrets
+import signal
+import sys
+import time
+from multiprocessing.context import SpawnProcess
+from socket import socket
+
+import uvicorn
+from uvicorn.supervisors.multiprocess import HANDLED_SIGNALS, Multiprocess
+
+from main._config import config
+from main.libs.log import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds between checks of the worker processes
+_SUPERVISOR_INTERVAL = 0.5
+# Seconds before replacing a crashed worker, doubling on every consecutive crash
+_RESTART_BACKOFF = 0.5
+_MAX_RESTART_BACKOFF = 30.0
+# Exit code of a worker which failed to start, as for uvicorn
+_STARTUP_FAILURE = 3
+
+# The listening sockets are passed to the worker processes
+multiprocessing.allow_connection_pickling()
+_spawn = multiprocessing.get_context("spawn")
+
+
+def get_worker_count() -> int:
+    return config.SERVER_WORKERS or os.cpu_count() or 1
+
+
+def get_server_config() -> uvicorn.Config:
+    return uvicorn.Config(
+        "main:app",
+        host=config.SERVER_HOST,
+        port=config.SERVER_PORT,
+        workers=get_worker_count(),
+        # uvloop and httptools are used when they are installed
+        loop="auto",
+        http="auto",
+        lifespan="on",
+        # The access log is written by the access log middleware
+        access_log=False,
+        backlog=config.SERVER_BACKLOG,
+        timeout_keep_alive=config.SERVER_KEEP_ALIVE_TIMEOUT,
+        limit_concurrency=config.SERVER_LIMIT_CONCURRENCY,
+        limit_max_requests=config.SERVER_MAX_REQUESTS,
+        timeout_graceful_shutdown=config.SERVER_GRACEFUL_SHUTDOWN_TIMEOUT,
+    )
+
+
+def _run_worker(server_config: uvicorn.Config, sockets: list[socket]):
+    """Run a worker, in a child process."""
+
+    server_config.configure_logging()
+    server = uvicorn.Server(server_config)
+    server.run(sockets=sockets)
+
+    # Otherwise, the worker exits cleanly, like after limit_max_requests
+    if not server.started:
+        sys.exit(_STARTUP_FAILURE)
+
+
+class WorkerSupervisor(Multiprocess):
+    """
+    Run the workers in child processes, and replace the workers which exit. The
+    supervisor of uvicorn does not replace them, so the server would end up
+    without any worker.
+
+    A worker exiting cleanly after serving ``limit_max_requests`` requests is
+    replaced immediately. A crashed worker is replaced after a backoff doubling on
+    every consecutive crash, and once a worker crashed more than ``max_restarts``
+    times in a row, e.g. because it fails to start, the server stops with
+    ``failed`` set, rather than restarting it forever. A worker running for
+    longer than the maximum backoff starts over.
+    """
+
+    def __init__(
+        self,
+        server_config: uvicorn.Config,
+        max_requests_jitter: int = 0,
+        max_restarts: int = 5,
+    ):
+        self.max_requests_jitter = max_requests_jitter
+        self.max_restarts = max_restarts
+        self.failed = False
+        super().__init__(
+            server_config,
+            target=uvicorn.Server(server_config).run,
+            sockets=[server_config.bind_socket()],
+        )
+
+        # Per worker, when it was started, its consecutive crashes, and when it is
+        # replaced once it exited
+        self._started_at: list[float] = []
+        self._crashes: list[int] = []
+        self._restart_at: list[float | None] = []
+
+    def run(self):
+        self.startup()
+        while not self.should_exit.wait(_SUPERVISOR_INTERVAL):
+            self.replace_exited_workers()
+        self.shutdown()
+
+    def startup(self):
+        for sig in HANDLED_SIGNALS:
+            signal.signal(sig, self.signal_handler)
+
+        logger.info("Starting workers", data={"workers": self.config.workers})
+        workers = self.config.workers
+        self.processes = [self.spawn_worker() for _ in range(workers)]
+        self._started_at = [time.monotonic()] * workers
+        self._crashes = [0] * workers
+        self._restart_at = [None] * workers
+
+    def spawn_worker(self) -> SpawnProcess:
+        server_config = self.config
+        max_requests = server_config.limit_max_requests
+        if max_requests and self.max_requests_jitter:
+            server_config = copy.copy(server_config)
+            server_config.limit_max_requests = max_requests + secrets.randbelow(
+                self.max_requests_jitter + 1,
+            )
+
+        process = _spawn.Process(
+            target=_run_worker,
+            kwargs={"server_config": server_config, "sockets": self.sockets},
+        )
+        process.start()
+        return process
+
+    def replace_exited_workers(self):
+        now = time.monotonic()
+        for index, process in enumerate(self.processes):
+            restart_at = self._restart_at[index]
+            if restart_at is None:
+                if process.is_alive():
+                    continue
+
+                process.join()
+                restart_at = self._schedule_restart(index, process, now)
+                if restart_at is None:
+                    return
+
+            if restart_at > now:
+                self._restart_at[index] = restart_at
+                continue
+
+            self._restart_at[index] = None
+            self._started_at[index] = now
+            self.processes[index] = self.spawn_worker()
+
+    def _schedule_restart(
+        self,
+        index: int,
+        process: SpawnProcess,
+        now: float,
+    ) -> float | None:
+        """When to replace the exited worker, or None to stop the server."""
+
+        data = {"pid": process.pid, "exitcode": process.exitcode}
+        if process.exitcode == 0 and self.config.limit_max_requests:
+            logger.info("Replacing recycled worker", data=data)
+            self._crashes[index] = 0
+            return now
+
+        if now - self._started_at[index] > _MAX_RESTART_BACKOFF:
+            self._crashes[index] = 0
+        self._crashes[index] += 1
+
+        crashes = self._crashes[index]
+        if crashes > self.max_restarts:
+            logger.error("Worker keeps crashing, stopping", data=data)
+            self.failed = True
+            self.should_exit.set()
+            return None
+
+        backoff = min(_RESTART_BACKOFF * 2 ** (crashes - 1), _MAX_RESTART_BACKOFF)
+        logger.warning(
+            "Replacing crashed worker",
+            data={**data, "crashes": crashes, "backoff": backoff},
+        )
+        return now + backoff
+
+
+def serve():
+    server_config = get_server_config()
+
+    if server_config.workers == 1 and not config.SERVER_MAX_REQUESTS:
+        uvicorn.Server(server_config).run()
+        return
+
+    supervisor = WorkerSupervisor(
+        server_config,
+        config.SERVER_MAX_REQUESTS_JITTER,
+        config.SERVER_WORKER_MAX_RESTARTS,
+    )
+    supervisor.run()
+    if supervisor.failed:
+        sys.exit(1)
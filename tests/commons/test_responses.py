@@ -0,0 +1,28 @@
+import json
+
+from main.commons.exceptions import ValidationError
+from main.commons.responses import FastJSONResponse
+from main.schemas.item import ItemListSchema, ItemSchema
+
+
+def test_fast_json_response():
+    schema = ItemListSchema(
+        items=[ItemSchema(id=1, data={"name": "a", "tags": ["x"]})],
+        next_cursor=None,
+    )
+    response = FastJSONResponse(schema)
+    assert json.loads(response.body) == schema.model_dump(mode="json")
+    assert response.headers["content-type"] == "application/json"
+
+    response = FastJSONResponse({"count": 1})
+    assert json.loads(response.body) == {"count": 1}
+
+
+def test_error_response():
+    response = ValidationError(error_data=[{"loc": ["body"]}]).to_response()
+    assert response.status_code == 400
+    assert json.loads(response.body) == {
+        "error_message": "Validation error.",
+        "error_data": [{"loc": ["body"]}],
+        "error_code": 400001,
+    }
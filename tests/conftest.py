@@ -6,6 +6,7 @@ from httpx import AsyncClient
 
 from main import app, config, db
 from main.libs.log import get_logger
+from main.libs.response_cache import response_cache
 from main.models.base import BaseModel
 
 logger = get_logger(__name__)
@@ -45,6 +46,9 @@ async def database():
     await transaction.rollback()
     await connection.close()
 
+    # The rolled back writes are still cached otherwise
+    await response_cache.clear()
+
 
 @pytest.fixture
 async def client():
@@ -1,3 +1,10 @@
+import json
+
+from pytest_mock import MockerFixture
+
+from main import config
+
+
 async def test_items(client):
     response = await client.get("/items/count")
     assert response.status_code == 200
@@ -9,3 +16,106 @@ async def test_items(client):
     response = await client.get("/items/count")
     assert response.status_code == 200
     assert response.json()["count"] == 1
+
+
+async def test_items_count_etag(client):
+    response = await client.get("/items/count")
+    etag = response.headers["etag"]
+
+    response = await client.get("/items/count", headers={"if-none-match": etag})
+    assert response.status_code == 304
+
+    await client.post("/items")
+
+    response = await client.get("/items/count", headers={"if-none-match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+async def test_add_items(client):
+    response = await client.post(
+        "/items/batch",
+        json=[{"data": {"name": "a"}}, {"data": None}, {}],
+    )
+    assert response.status_code == 200
+    ids = response.json()["ids"]
+    assert len(ids) == 3
+    assert ids == sorted(ids)
+
+    response = await client.post(
+        "/items/batch",
+        content=b'{"data": {"name": "b"}}\n\n{"data": {"name": "c"}}',
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert len(response.json()["ids"]) == 2
+
+    response = await client.get("/items/count")
+    assert response.json()["count"] == 5
+
+
+async def test_add_items_validation_error(client):
+    response = await client.post("/items/batch", json={"data": {}})
+    assert response.status_code == 400
+
+    response = await client.post("/items/batch", content=b"[{")
+    assert response.status_code == 400
+
+    response = await client.post(
+        "/items/batch",
+        content=b'{"data": {}}\n{"data": 1}\n',
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 400
+    assert response.json()["error_data"][0]["loc"] == ["body", 1, "data"]
+
+    # The indexed keys of the data must fit their columns
+    for data in ({"price": "cheap"}, {"category": "a" * 65}):
+        response = await client.post("/items/batch", json=[{"data": data}])
+        assert response.status_code == 400
+
+    # Nothing is inserted when any item is invalid
+    response = await client.get("/items/count")
+    assert response.json()["count"] == 0
+
+
+async def test_get_items(client):
+    response = await client.post(
+        "/items/batch",
+        json=[{"data": {"index": i}} for i in range(5)],
+    )
+    ids = response.json()["ids"]
+
+    response = await client.get("/items", params={"limit": 3})
+    assert response.status_code == 200
+    page = response.json()
+    assert [item["id"] for item in page["items"]] == ids[:3]
+    assert page["items"][0]["data"] == {"index": 0}
+    assert page["next_cursor"] == ids[2]
+
+    response = await client.get(
+        "/items",
+        params={"limit": 3, "cursor": page["next_cursor"]},
+    )
+    page = response.json()
+    assert [item["id"] for item in page["items"]] == ids[3:]
+    assert page["next_cursor"] is None
+
+    response = await client.get("/items", params={"limit": 0})
+    assert response.status_code == 400
+
+
+async def test_export_items(client, mocker: MockerFixture):
+    mocker.patch.object(config, "ITEMS_EXPORT_CHUNK_SIZE", 2)
+    response = await client.post(
+        "/items/batch",
+        json=[{"data": {"index": i}} for i in range(5)],
+    )
+    ids = response.json()["ids"]
+
+    response = await client.get("/items/export", params={"cursor": ids[0]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"id": item_id, "data": {"index": i}} for i, item_id in enumerate(ids)
+    ][1:]
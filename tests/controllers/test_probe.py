@@ -1,6 +1,36 @@
+from pytest_mock import MockerFixture
+
+from main import health_monitor
+from main.enums import HealthStatus
+
+
 async def test_ping(client):
     response = await client.post("/pings")
     assert response.status_code == 405
 
     response = await client.get("/pings")
     assert response.status_code == 200
+
+
+async def test_metrics(client):
+    await client.get("/pings")
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_requests_total{method="GET",route="/pings",status="2xx"}' in response.text
+    )
+    assert "http_request_duration_seconds_bucket" in response.text
+    assert "db_pool_checkout_duration_seconds" in response.text
+
+
+async def test_ready(client, mocker: MockerFixture):
+    mocker.patch.object(health_monitor, "status", HealthStatus.HEALTHY)
+    response = await client.get("/ready")
+    assert response.status_code == 200
+
+    mocker.patch.object(health_monitor, "status", HealthStatus.OVERLOADED)
+    response = await client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["error_data"] == {"status": "overloaded"}
@@ -1,4 +1,22 @@
-from main.engines.items import add_item, count_items
+import asyncio
+
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy import select
+
+from main import config, db
+from main.engines.items import (
+    add_item,
+    add_items,
+    count_items,
+    find_items,
+    item_data,
+    items_count,
+    list_items,
+)
+from main.libs.deadline import DeadlineExceeded, deadline_context
+from main.libs.query_stats import QueryStats, query_stats_context
+from main.models.item import ItemModel
 
 
 async def test_log():
@@ -7,3 +25,134 @@ async def test_log():
     await add_item()
 
     assert (await count_items()) == 1
+
+
+async def test_cached_count(mocker: MockerFixture):
+    mocker.patch.object(items_count, "ttl", 60)
+    items_count.invalidate()
+
+    try:
+        assert (await count_items()) == 0
+
+        await add_item()
+        await add_item()
+
+        # Maintained from the writes, without querying the database
+        mock_query = mocker.patch.object(items_count, "fetch")
+        assert (await count_items()) == 2
+        assert not mock_query.called
+    finally:
+        items_count.invalidate()
+
+
+async def test_add_items():
+    ids = await add_items(({"index": i} for i in range(5)), chunk_size=2)
+
+    assert len(ids) == 5
+    assert (await count_items()) == 5
+
+    items = await db.session.scalars(
+        select(ItemModel).where(ItemModel.id.in_(ids)).order_by(ItemModel.id),
+    )
+    assert [item.data for item in items] == [{"index": i} for i in range(5)]
+
+
+async def test_add_item_write_behind(mocker: MockerFixture):
+    mocker.patch.object(config, "ITEMS_WRITE_BEHIND_ENABLED", True)
+    mock_add_items = mocker.patch(
+        "main.engines.items.add_items",
+        wraps=add_items,
+    )
+
+    items = await asyncio.gather(*(add_item() for _ in range(3)))
+
+    # A single multi-row insert for the concurrent calls
+    mock_add_items.assert_called_once()
+    assert len({item.id for item in items}) == 3
+    assert (await count_items()) == 3
+
+
+async def test_count_items_coalesced(mocker: MockerFixture):
+    mocker.patch.object(items_count, "ttl", 0)
+    stats = QueryStats()
+    token = query_stats_context.set(stats)
+
+    try:
+        counts = await asyncio.gather(*(count_items() for _ in range(10)))
+    finally:
+        query_stats_context.reset(token)
+
+    assert len(set(counts)) == 1
+    assert stats.count == 1
+
+
+async def test_count_items_use_primary(mocker: MockerFixture):
+    mocker.patch.object(items_count, "ttl", 0)
+    mock_scope = mocker.spy(db, "scope")
+
+    await count_items()
+    assert mock_scope.call_count == 1
+
+    # Read from the session of the caller, which is pinned to the primary
+    db.use_primary()
+    assert (await count_items()) == 0
+    assert mock_scope.call_count == 1
+
+
+async def test_count_items_deadline(mocker: MockerFixture):
+    mocker.patch.object(items_count, "ttl", 0)
+
+    async with db.scope(lazy=True, timeout=5):
+        deadline = deadline_context.get()
+        assert deadline is not None
+        deadline.cancel()
+
+        # The caller is cancelled, even though the shared query is not
+        with pytest.raises(DeadlineExceeded):
+            await count_items()
+
+
+async def test_list_items_own_writes(mocker: MockerFixture):
+    mocker.patch.object(items_count, "ttl", 0)
+    # Each session on its own connection, rather than on the one of the test
+    mocker.patch.dict(db.session_factory.kw, {"bind": db.engine})
+    mock_scope = mocker.spy(db, "scope")
+
+    async with db.scope():
+        item = ItemModel(data={})
+        db.session.add(item)
+        await db.session.flush()
+
+        # Read from the session of the caller, which has an open transaction
+        assert (await list_items(None, 10)) == [item]
+        assert (await count_items()) == 1
+        assert mock_scope.call_count == 1
+
+
+def _get_prices(items: list[ItemModel]) -> list[int]:
+    return [item.data["price"] for item in items if item.data is not None]
+
+
+async def test_find_items():
+    await add_items(
+        [
+            {"category": "a", "price": 10, "color": "red"},
+            {"category": "b", "price": 20, "color": "blue"},
+            {"category": "a", "price": 30, "color": "red"},
+            None,
+        ],
+    )
+
+    # The hot keys are read from their indexed columns
+    assert item_data("category") is ItemModel.__table__.c.data_category
+
+    items = await find_items(item_data("category") == "a")
+    assert _get_prices(items) == [10, 30]
+
+    items = await find_items(item_data("price") >= 20, item_data("color") == "red")
+    assert _get_prices(items) == [30]
+
+    items = await find_items(item_data("price").between(10, 20), limit=1)
+    assert _get_prices(items) == [10]
+    items = await find_items(item_data("price").between(10, 20), cursor=items[0].id)
+    assert _get_prices(items) == [20]
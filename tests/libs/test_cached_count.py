@@ -0,0 +1,36 @@
+from unittest.mock import AsyncMock
+
+from pytest_mock import MockerFixture
+
+from main.libs.cached_count import CachedCount
+
+
+async def test_cached_count(mocker: MockerFixture):
+    mock_time = mocker.patch("main.libs.cached_count.time.monotonic", return_value=0)
+    fetch = AsyncMock(return_value=10)
+    count = CachedCount(fetch, ttl=5)
+
+    assert await count.get() == 10
+    count.increment(2)
+    assert await count.get() == 12
+    assert fetch.await_count == 1
+
+    # The count is reconciled once it is older than the TTL
+    mock_time.return_value = 5
+    fetch.return_value = 20
+    assert await count.get() == 20
+    assert fetch.await_count == 2
+
+    count.invalidate()
+    assert await count.get() == 20
+    assert fetch.await_count == 3
+
+
+async def test_cached_count_disabled():
+    fetch = AsyncMock(return_value=10)
+    count = CachedCount(fetch, ttl=0)
+
+    count.increment()
+    assert await count.get() == 10
+    assert await count.get() == 10
+    assert fetch.await_count == 2
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from main.libs.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    deadline_context,
+    limit_execution_time,
+)
+
+
+async def test_deadline_expires():
+    deadline = Deadline(0.01)
+
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        async with deadline.enforce():
+            await asyncio.sleep(1)
+
+    assert not exc_info.value.cancelled
+
+    # Without deadline, the statements are not limited
+    async with Deadline().enforce():
+        await asyncio.sleep(0)
+
+
+async def test_deadline_cancel():
+    deadline = Deadline()
+
+    async def statement():
+        async with deadline.enforce():
+            await asyncio.sleep(1)
+
+    task = asyncio.create_task(statement())
+    await asyncio.sleep(0)
+    deadline.cancel()
+
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        await task
+    assert exc_info.value.cancelled
+
+    # The next statements fail immediately
+    with pytest.raises(DeadlineExceeded):
+        async with deadline.enforce():
+            pass
+
+
+async def test_deadline_task_cancelled():
+    deadline = Deadline(10)
+
+    async def statement():
+        async with deadline.enforce():
+            await asyncio.sleep(1)
+
+    task = asyncio.create_task(statement())
+    await asyncio.sleep(0)
+    task.cancel()
+
+    # Cancelling the task itself is not a deadline
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert not deadline._timeouts
+
+
+async def test_deadline_shorten():
+    deadline = Deadline(10)
+    expires_at = deadline.expires_at
+
+    with deadline.shorten(0.01):
+        assert (deadline.remaining() or 0) <= 0.01
+        # A longer timeout does not extend the deadline
+        with deadline.shorten(20):
+            assert (deadline.remaining() or 0) <= 0.01
+
+    assert deadline.expires_at == expires_at
+
+
+async def test_limit_execution_time():
+    engine = create_engine("sqlite://")
+    limit_execution_time(engine)
+    statements = []
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    token = deadline_context.set(Deadline(2))
+    try:
+        with engine.connect() as connection:
+            # The hint is a comment for SQLite
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("CREATE TABLE t (id INTEGER)"))
+            # The streamed statements keep running while their rows are fetched
+            streamed = connection.execution_options(yield_per=10)
+            streamed.execute(text("SELECT 2"))
+    finally:
+        deadline_context.reset(token)
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    assert statements[0].startswith("SELECT /*+ MAX_EXECUTION_TIME(")
+    milliseconds = int(statements[0].split("(")[1].split(")")[0])
+    assert 1_900 < milliseconds <= 2_000
+    assert statements[1:] == ["CREATE TABLE t (id INTEGER)", "SELECT 2", "SELECT 1"]
@@ -0,0 +1,65 @@
+import asyncio
+
+from main.enums import HealthStatus
+from main.libs.health import HealthMonitor
+
+
+async def test_health_monitor_caches_status():
+    calls = 0
+
+    async def check():
+        nonlocal calls
+        calls += 1
+        return HealthStatus.HEALTHY
+
+    monitor = HealthMonitor(check, interval=0, timeout=1)
+    assert monitor.status == HealthStatus.STARTING
+    assert not monitor.is_healthy
+
+    assert await monitor.update() == HealthStatus.HEALTHY
+    assert monitor.is_healthy
+    assert monitor.is_healthy
+    assert calls == 1
+
+
+async def test_health_monitor_failing_check():
+    async def failing_check():
+        raise ConnectionError
+
+    async def slow_check():
+        await asyncio.sleep(1)
+        return HealthStatus.HEALTHY
+
+    monitor = HealthMonitor(failing_check, interval=0, timeout=1)
+    assert await monitor.update() == HealthStatus.DEGRADED
+
+    monitor = HealthMonitor(slow_check, interval=0, timeout=0.01)
+    assert await monitor.update() == HealthStatus.DEGRADED
+
+
+async def test_health_monitor_disabled():
+    async def failing_check():
+        raise ConnectionError
+
+    monitor = HealthMonitor(failing_check, interval=0, timeout=1)
+    assert not monitor.enabled
+
+    # Nothing would update the status, so it is not stuck on a failed check
+    await monitor.update()
+    monitor.start()
+    assert monitor.is_healthy
+    await monitor.stop()
+
+
+async def test_health_monitor_background_checks():
+    statuses = iter([HealthStatus.HEALTHY, HealthStatus.OVERLOADED])
+
+    async def check():
+        return next(statuses, HealthStatus.OVERLOADED)
+
+    monitor = HealthMonitor(check, interval=0.01, timeout=1)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    assert monitor.status == HealthStatus.OVERLOADED
@@ -0,0 +1,122 @@
+import io
+import json
+import logging
+
+from pytest_mock import MockerFixture
+
+from main.enums import LogQueueFullPolicy
+from main.libs import log
+from main.libs.log import (
+    JSONFormatter,
+    LogPipeline,
+    TextFormatter,
+    _QueueLogHandler,
+    shutdown_logging,
+)
+
+
+def test_log_pipeline_writes_lines_in_batches():
+    stream = io.StringIO()
+    pipeline = LogPipeline(
+        stream,
+        max_size=100,
+        batch_size=10,
+        full_policy=LogQueueFullPolicy.BLOCK,
+    )
+
+    logger = logging.getLogger("tests.log_pipeline")
+    logger.propagate = False
+    handler = _QueueLogHandler(pipeline)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    logger.addHandler(handler)
+
+    try:
+        pipeline.start()
+        for i in range(25):
+            logger.warning("line %d", i)
+    finally:
+        logger.removeHandler(handler)
+        pipeline.stop()
+
+    assert stream.getvalue().splitlines() == [f"WARNING line {i}" for i in range(25)]
+
+
+def test_log_pipeline_writes_directly_once_stopped(mocker: MockerFixture):
+    stream = io.StringIO()
+    pipeline = LogPipeline(
+        stream,
+        max_size=1,
+        batch_size=10,
+        full_policy=LogQueueFullPolicy.BLOCK,
+    )
+    mocker.patch("main.libs.log._log_pipeline", pipeline)
+
+    pipeline.start()
+    pipeline.put("line 0")
+    shutdown_logging()
+    assert log._log_pipeline is None
+
+    # Neither lost in the queue, nor blocking on it once full
+    pipeline.put("line 1")
+    pipeline.put("line 2")
+
+    assert stream.getvalue().splitlines() == ["line 0", "line 1", "line 2"]
+
+
+def test_log_pipeline_drops_lines_when_full():
+    stream = io.StringIO()
+    pipeline = LogPipeline(
+        stream,
+        max_size=2,
+        batch_size=10,
+        full_policy=LogQueueFullPolicy.DROP,
+    )
+
+    # The pipeline is not started yet, so nothing is consumed from the queue
+    for i in range(5):
+        pipeline.put(f"line {i}")
+
+    assert pipeline.dropped == 3
+
+    pipeline.start()
+    pipeline.stop()
+
+    assert stream.getvalue().splitlines() == ["line 0", "line 1"]
+
+
+def test_json_formatter():
+    logger = logging.getLogger("tests.json_formatter")
+    logger.propagate = False
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JSONFormatter())
+    logger.addHandler(handler)
+
+    try:
+        logger.warning("Hello %s", "world", data={"id": 1})  # type: ignore[call-arg]
+    finally:
+        logger.removeHandler(handler)
+
+    log = json.loads(stream.getvalue())
+    assert log["logger"] == "tests.json_formatter"
+    assert log["level"] == "WARNING"
+    assert log["module"] == "test_log"
+    assert log["message"] == "Hello world"
+    assert log["data"] == {"id": 1}
+    assert log["request_id"] is None
+
+
+def test_text_formatter():
+    record = logging.makeLogRecord({"msg": "Hello", "data": {"id": 1}})
+
+    assert TextFormatter("%(message)s").format(record) == 'Hello | {"id":1}'
+
+
+def test_data_is_not_serialized_when_level_is_disabled(mocker: MockerFixture):
+    logger = logging.getLogger("tests.disabled_level")
+    logger.setLevel(logging.WARNING)
+    mock_dumps = mocker.patch("main.libs.serialization.dumps")
+
+    logger.info("Hello", data={"id": 1})  # type: ignore[call-arg]
+
+    assert not mock_dumps.called
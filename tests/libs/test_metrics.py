@@ -0,0 +1,44 @@
+from main.libs.metrics import MetricsRegistry
+
+
+def test_counter():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests.", ("method",))
+
+    counter.inc(("GET",))
+    counter.inc(("GET",))
+    counter.inc(("POST",), 3)
+
+    assert counter.get(("GET",)) == 2
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{method="GET"} 2',
+        'requests_total{method="POST"} 3',
+    ]
+
+
+def test_histogram():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value)
+
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 2.65",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_gauge():
+    registry = MetricsRegistry()
+    values = [3, None]
+    registry.gauge("pool_size", "Pool size.", lambda: values.pop(0))
+
+    assert registry.render().splitlines()[-1] == "pool_size 3"
+    # A gauge without value is not rendered
+    assert registry.render().splitlines()[-1] == "# TYPE pool_size gauge"
@@ -0,0 +1,63 @@
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from main import config
+from main.engines.items import add_item, count_items
+from main.libs.query_stats import (
+    QueryStats,
+    fingerprint,
+    instrument_engine,
+    query_stats_context,
+)
+
+
+def test_fingerprint():
+    assert fingerprint(
+        "SELECT item.id FROM item\n  WHERE item.id IN (%s, %s, %s) AND name = 'a''b'",
+    ) == ("SELECT item.id FROM item WHERE item.id IN (?) AND name = ?")
+    assert fingerprint("INSERT INTO item (data) VALUES (?), (?), (?)") == (
+        "INSERT INTO item (data) VALUES (?), ..."
+    )
+    assert fingerprint("SELECT * FROM item_2 LIMIT 10") == (
+        "SELECT * FROM item_2 LIMIT ?"
+    )
+
+
+async def test_query_stats(mocker: MockerFixture):
+    mock_logger = mocker.patch("main.libs.query_stats.logger")
+    stats = QueryStats()
+    token = query_stats_context.set(stats)
+
+    try:
+        await count_items()
+        await add_item()
+    finally:
+        query_stats_context.reset(token)
+
+    assert stats.count >= 2
+    assert stats.duration > 0
+    assert not mock_logger.warning.called
+
+    mocker.patch.object(config, "SQLALCHEMY_SLOW_QUERY_THRESHOLD", 0)
+    await count_items()
+
+    mock_logger.warning.assert_called_once()
+    assert mock_logger.warning.call_args.kwargs["data"]["fingerprint"] == (
+        "SELECT count(*) AS count_1 FROM item"
+    )
+
+
+def test_instrument_engine_failed_statements():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing"))
+
+        # The start time of the failed statement is not left behind
+        assert connection.info["query_start_time"] == []
+        connection.execute(text("SELECT 1"))
+        assert connection.info["query_start_time"] == []
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, FastAPI
+from httpx import AsyncClient
+
+from main.libs.response_cache import (
+    CachedResponse,
+    CachedRoute,
+    LRUCacheBackend,
+    ResponseCache,
+)
+
+
+def _make_app(cache: ResponseCache, ttl: float) -> tuple[FastAPI, list[str]]:
+    calls = []
+    router = APIRouter(route_class=CachedRoute)
+
+    @router.get("/values")
+    @cache.cached(ttl=ttl, tags=["values"])
+    async def get_values(name: str = ""):
+        calls.append(name)
+        return {"name": name}
+
+    app = FastAPI()
+    app.include_router(router)
+
+    return app, calls
+
+
+async def test_response_cache():
+    cache = ResponseCache(LRUCacheBackend(max_size=10))
+    app, calls = _make_app(cache, ttl=60)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/values?name=a")
+        etag = response.headers["etag"]
+        assert response.json() == {"name": "a"}
+
+        response = await client.get("/values?name=a")
+        assert response.json() == {"name": "a"}
+        assert response.headers["etag"] == etag
+        assert calls == ["a"]
+
+        response = await client.get("/values?name=a", headers={"if-none-match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert calls == ["a"]
+
+        await client.get("/values?name=b")
+        assert calls == ["a", "b"]
+
+        await cache.invalidate_tags("values")
+        response = await client.get("/values?name=a", headers={"if-none-match": etag})
+        assert response.status_code == 304
+        assert calls == ["a", "b", "a"]
+
+
+async def test_response_cache_without_ttl():
+    cache = ResponseCache(LRUCacheBackend(max_size=10))
+    app, calls = _make_app(cache, ttl=0)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/values")
+        etag = response.headers["etag"]
+
+        response = await client.get("/values", headers={"if-none-match": etag})
+        assert response.status_code == 304
+        assert len(calls) == 2
+
+
+async def test_lru_cache_backend():
+    backend = LRUCacheBackend(max_size=2)
+    value = CachedResponse(b"{}", 200, [], '"etag"')
+
+    await backend.set("a", value, ttl=60, tags=["x"])
+    await backend.set("b", value, ttl=60, tags=["y"])
+    assert await backend.get("a") is value
+
+    # "b" is the least recently used
+    await backend.set("c", value, ttl=60, tags=["x"])
+    assert await backend.get("b") is None
+    assert len(backend) == 2
+
+    await backend.invalidate_tags(["x"])
+    assert len(backend) == 0
+
+    await backend.set("a", value, ttl=0)
+    assert await backend.get("a") is None
@@ -0,0 +1,124 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from main.libs.single_flight import SingleFlight, single_flight
+
+
+class CustomException(Exception):
+    pass
+
+
+async def test_single_flight_coalesces_concurrent_calls():
+    calls = []
+
+    @single_flight()
+    async def fetch(key, page=0):
+        calls.append((key, page))
+        await asyncio.sleep(0.01)
+        return [key, page]
+
+    results = await asyncio.gather(
+        fetch("a"),
+        fetch("a"),
+        fetch("b"),
+        fetch("a", page=1),
+    )
+
+    assert results == [["a", 0], ["a", 0], ["b", 0], ["a", 1]]
+    assert calls == [("a", 0), ("b", 0), ("a", 1)]
+    assert fetch.single_flight.in_flight == 0  # type: ignore[attr-defined]
+
+    # Nothing is cached once the call completed
+    await fetch("a")
+    assert len(calls) == 4
+
+
+async def test_single_flight_failure():
+    flight: SingleFlight[int] = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise CustomException
+
+    results = await asyncio.gather(
+        flight.do("key", fail),
+        flight.do("key", fail),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, CustomException) for result in results)
+    assert flight.in_flight == 0
+
+
+async def test_single_flight_cancellation():
+    flight: SingleFlight[int] = SingleFlight()
+    started = 0
+
+    async def fetch():
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.01)
+        return started
+
+    first = asyncio.create_task(flight.do("key", fetch))
+    second = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+
+    # The call goes on for the other caller
+    first.cancel()
+    assert await second == 1
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    # The call is cancelled with its last caller, and the next one starts anew
+    only = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    only.cancel()
+    assert await flight.do("key", fetch) == 2
+    with pytest.raises(asyncio.CancelledError):
+        await only
+
+
+async def test_single_flight_scope():
+    scopes = []
+
+    @asynccontextmanager
+    async def scope():
+        scopes.append("enter")
+        yield
+        scopes.append("exit")
+
+    @single_flight(key=lambda value: value % 2, scope=scope)
+    async def fetch(value):
+        await asyncio.sleep(0)
+        return value
+
+    assert await asyncio.gather(fetch(1), fetch(3), fetch(2)) == [1, 1, 2]
+    assert scopes == ["enter", "enter", "exit", "exit"]
+
+
+async def test_single_flight_wait_and_bypass():
+    waits = []
+    bypassed = False
+
+    @asynccontextmanager
+    async def wait():
+        waits.append("wait")
+        yield
+
+    @single_flight(wait=wait, bypass=lambda: bypassed)
+    async def fetch(value):
+        await asyncio.sleep(0)
+        return [value]
+
+    first, second = await asyncio.gather(fetch(1), fetch(1))
+    assert first is second
+    assert waits == ["wait", "wait"]
+
+    # The bypassing callers make their own calls, without waiting
+    bypassed = True
+    first, second = await asyncio.gather(fetch(1), fetch(1))
+    assert first is not second
+    assert waits == ["wait", "wait"]
@@ -0,0 +1,87 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+import pytest
+
+from main.libs.tasks import (
+    TaskQueue,
+    TaskQueueClosedError,
+    TaskQueueFullError,
+    tasks_total,
+)
+
+request_context: ContextVar[str | None] = ContextVar("request_context", default=None)
+
+
+async def test_task_queue():
+    scopes = []
+    results = []
+
+    @asynccontextmanager
+    async def scope():
+        scopes.append("enter")
+        yield
+        scopes.append("exit")
+
+    async def task(value):
+        await asyncio.sleep(0)
+        results.append((value, request_context.get()))
+
+    queue = TaskQueue(concurrency=2, max_size=10, scope=scope)
+    request_context.set("request")
+
+    # Returns immediately
+    for i in range(3):
+        queue.enqueue(task, i)
+    assert results == []
+
+    # Close waits for the queued tasks
+    await queue.close()
+    assert sorted(results) == [(0, None), (1, None), (2, None)]
+    assert scopes.count("enter") == scopes.count("exit") == 3
+
+    with pytest.raises(TaskQueueClosedError):
+        queue.enqueue(task, 3)
+
+
+async def test_task_queue_retries():
+    attempts = 0
+
+    async def flaky_task():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise RuntimeError
+
+    async def failing_task():
+        raise RuntimeError
+
+    queue = TaskQueue(concurrency=1, max_size=10, max_retries=2, retry_backoff=0)
+    queue.enqueue(flaky_task)
+    queue.enqueue(failing_task)
+    await queue.close()
+
+    assert attempts == 3
+    assert tasks_total.get((flaky_task.__qualname__, "succeeded")) == 1
+    assert tasks_total.get((failing_task.__qualname__, "retried")) == 2
+    assert tasks_total.get((failing_task.__qualname__, "failed")) == 1
+
+
+async def test_task_queue_bounds():
+    release = asyncio.Event()
+
+    async def task():
+        await release.wait()
+
+    queue = TaskQueue(concurrency=1, max_size=1)
+    queue.enqueue(task)
+    await asyncio.sleep(0)
+    queue.enqueue(task)
+
+    with pytest.raises(TaskQueueFullError):
+        queue.enqueue(task)
+
+    # The tasks left after the timeout are dropped
+    await queue.close(timeout=0.01)
+    assert queue.size == 1
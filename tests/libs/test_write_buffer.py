@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from main.libs.write_buffer import CoalescingWriteBuffer, WriteBufferClosedError
+
+
+class CustomException(Exception):
+    pass
+
+
+async def test_write_buffer_flushes_full_batches():
+    batches = []
+
+    async def write(batch):
+        batches.append(batch)
+        return [item * 10 for item in batch]
+
+    buffer = CoalescingWriteBuffer(write, max_size=3, max_delay=60)
+    results = await asyncio.gather(*(buffer.submit(i) for i in range(6)))
+
+    assert results == [0, 10, 20, 30, 40, 50]
+    assert batches == [[0, 1, 2], [3, 4, 5]]
+
+
+async def test_write_buffer_flushes_after_delay():
+    batches = []
+
+    async def write(batch):
+        batches.append(batch)
+        return batch
+
+    buffer = CoalescingWriteBuffer(write, max_size=100, max_delay=0.01)
+
+    assert await asyncio.gather(buffer.submit(1), buffer.submit(2)) == [1, 2]
+    assert batches == [[1, 2]]
+
+
+async def test_write_buffer_failure():
+    async def write(_):
+        raise CustomException
+
+    buffer = CoalescingWriteBuffer(write, max_size=2, max_delay=60)
+    results = await asyncio.gather(
+        buffer.submit(1),
+        buffer.submit(2),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, CustomException) for result in results)
+
+
+async def test_write_buffer_close_drains_pending_items():
+    batches = []
+
+    async def write(batch):
+        await asyncio.sleep(0)
+        batches.append(batch)
+        return batch
+
+    buffer = CoalescingWriteBuffer(write, max_size=100, max_delay=60)
+    task = asyncio.create_task(buffer.submit(1))
+    await asyncio.sleep(0)
+
+    await buffer.close()
+
+    assert batches == [[1]]
+    assert await task == 1
+
+    with pytest.raises(WriteBufferClosedError):
+        await buffer.submit(2)
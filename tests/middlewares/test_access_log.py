@@ -0,0 +1,81 @@
+from typing import TYPE_CHECKING, cast
+
+from main.libs.query_stats import QueryStats
+from main.middlewares.access_log import (
+    AccessInfo,
+    AccessLogFormatter,
+    AccessLogMiddleware,
+)
+
+if TYPE_CHECKING:
+    from asgiref.typing import HTTPScope
+
+SCOPE = cast(
+    "HTTPScope",
+    {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "path": "/items/count",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"user-agent", b"kube-probe/1.22+"),
+            (b"x-forwarded-for", b"1.2.3.4, 5.6.7.8"),
+        ],
+        "client": ("127.0.0.6", 12345),
+    },
+)
+
+INFO = AccessInfo(
+    response={
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-length", b"11")],
+        "trailers": False,
+    },
+    start_time=1_000.0,
+    end_time=1_000.25,
+    query_stats=QueryStats(),
+)
+INFO["query_stats"].count = 2
+INFO["query_stats"].duration = 0.125
+
+
+def test_formatter_only_computes_referenced_atoms():
+    formatter = AccessLogFormatter('"%(R)s" %(s)d %(B)s %(M)d')
+
+    assert formatter(SCOPE, INFO) == {
+        "R": "GET /items/count HTTP/1.1",
+        "s": 200,
+        "B": "11",
+        "M": 250,
+    }
+
+
+def test_formatter_default_format():
+    formatter = AccessLogFormatter(AccessLogMiddleware.DEFAULT_FORMAT)
+    line = formatter.format % formatter(SCOPE, INFO)
+
+    assert line.startswith("127.0.0.6 - - [")
+    assert line.endswith(
+        '"GET /items/count HTTP/1.1" 200 11 "-" "kube-probe/1.22+" "5.6.7.8" 0.250'
+        " 2 0.125",
+    )
+
+
+def test_formatter_header_and_environment_atoms(monkeypatch):
+    monkeypatch.setenv("SERVICE_NAME", "items")
+    formatter = AccessLogFormatter(
+        "%({User-Agent}i)s %({Content-Length}o)s %({SERVICE_NAME}e)s %(unknown)s",
+    )
+
+    # Environment atoms are snapshotted when the format is compiled
+    monkeypatch.setenv("SERVICE_NAME", "changed")
+
+    assert formatter(SCOPE, INFO) == {
+        "{User-Agent}i": "kube-probe/1.22+",
+        "{Content-Length}o": "11",
+        "{SERVICE_NAME}e": "items",
+        "unknown": "-",
+    }
@@ -0,0 +1,141 @@
+import asyncio
+
+from httpx import AsyncClient
+from starlette.responses import PlainTextResponse
+
+from main import db
+from main.middlewares import AdmissionControlHook, MiddlewarePipeline
+from main.middlewares.admission import ConcurrencyLimiter
+
+
+def make_client(hook: AdmissionControlHook, release: asyncio.Event | None = None):
+    async def app(scope, receive, send):
+        if release is not None and scope["path"] != "/pings":
+            await release.wait()
+        await PlainTextResponse("app")(scope, receive, send)
+
+    return AsyncClient(app=MiddlewarePipeline(app, [hook]), base_url="http://test")
+
+
+async def test_concurrency_limiter():
+    limiter = ConcurrencyLimiter(1, queue_size=1, queue_timeout=0.05)
+
+    assert await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    # The queue is full
+    assert not await limiter.acquire()
+
+    limiter.release()
+    assert await waiter
+
+    # Waited for too long
+    assert not await limiter.acquire()
+    assert limiter.waiting == 0
+
+
+async def test_admission_control_limits_in_flight_requests():
+    release = asyncio.Event()
+    hook = AdmissionControlHook(
+        max_in_flight=1,
+        queue_size=0,
+        exempt_paths=["/pings"],
+    )
+
+    async with make_client(hook, release) as client:
+        admitted = asyncio.create_task(client.get("/items"))
+        await asyncio.sleep(0.01)
+
+        response = await client.get("/items")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert response.json()["error_data"] == {"reason": "concurrency"}
+
+        # Exempt paths are never rejected
+        assert (await client.get("/pings")).status_code == 200
+
+        release.set()
+        assert (await admitted).status_code == 200
+        assert (await client.get("/items")).status_code == 200
+
+    assert hook.in_flight == 0
+
+
+async def test_admission_control_path_limits():
+    release = asyncio.Event()
+    hook = AdmissionControlHook(path_limits={"/slow": 1}, queue_size=0)
+
+    async with make_client(hook, release) as client:
+        admitted = asyncio.create_task(client.get("/slow"))
+        await asyncio.sleep(0.01)
+
+        assert (await client.get("/slow")).status_code == 503
+        other = asyncio.create_task(client.get("/fast"))
+
+        release.set()
+        assert (await admitted).status_code == 200
+        assert (await other).status_code == 200
+
+
+async def test_admission_control_sheds_on_pool_waiters(monkeypatch):
+    hook = AdmissionControlHook(max_pending_pool_checkouts=2)
+
+    async with make_client(hook) as client:
+        monkeypatch.setattr(db, "pending_pool_checkouts", 2)
+        response = await client.get("/items")
+        assert response.status_code == 503
+        assert response.json()["error_data"] == {"reason": "db_pool"}
+
+        monkeypatch.setattr(db, "pending_pool_checkouts", 1)
+        assert (await client.get("/items")).status_code == 200
+
+
+async def test_admission_control_sheds_on_latency():
+    release = asyncio.Event()
+    hook = AdmissionControlHook(max_latency=0.1)
+    hook.latency = 1
+
+    async with make_client(hook, release) as client:
+        # Nothing is in flight, so the request is admitted to measure the latency
+        admitted = asyncio.create_task(client.get("/items"))
+        await asyncio.sleep(0.01)
+
+        response = await client.get("/items")
+        assert response.status_code == 503
+        assert response.json()["error_data"] == {"reason": "latency"}
+
+        release.set()
+        assert (await admitted).status_code == 200
+        assert hook.latency < 1
+
+
+async def test_admission_control_latency_of_streams():
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await release.wait()
+        await send({"type": "http.response.body", "body": b"stream"})
+
+    hook = AdmissionControlHook(max_latency=0.1)
+    pipeline = MiddlewarePipeline(app, [hook])
+
+    async with AsyncClient(app=pipeline, base_url="http://test") as client:
+        stream = asyncio.create_task(client.get("/export"))
+        await asyncio.sleep(0.01)
+
+        # The stream only counts until it starts responding
+        assert hook.in_flight == 1
+        assert hook.awaiting_response == 0
+        assert hook.latency < 0.1
+
+        # Nothing else is waiting for its response, so a request is admitted
+        hook.latency = 1
+        admitted = asyncio.create_task(client.get("/items"))
+        await asyncio.sleep(0.01)
+        release.set()
+
+        assert (await admitted).status_code == 200
+        assert (await stream).text == "stream"
+
+    assert hook.in_flight == 0
@@ -0,0 +1,78 @@
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware as StarletteCORSMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from main.middlewares import CORSMiddleware
+
+
+async def homepage(_):
+    return PlainTextResponse("Homepage")
+
+
+def make_app(middleware_class, **options) -> Starlette:
+    return Starlette(
+        routes=[Route("/", homepage, methods=["GET", "POST"])],
+        middleware=[Middleware(middleware_class, **options)],
+    )
+
+
+OPTIONS = [
+    {
+        "allow_origins": ["*"],
+        "allow_credentials": True,
+        "allow_methods": ["*"],
+        "allow_headers": ["*"],
+    },
+    {"allow_origins": ["*"], "expose_headers": ["X-Status"]},
+    {
+        "allow_origins": ["https://example.org"],
+        "allow_methods": ["GET", "POST"],
+        "allow_headers": ["X-Token"],
+        "max_age": 60,
+    },
+]
+
+REQUESTS: list[tuple[str, dict[str, str]]] = [
+    ("GET", {}),
+    ("GET", {"origin": "https://example.org"}),
+    ("GET", {"origin": "https://example.org", "cookie": "a=b"}),
+    ("POST", {"origin": "https://other.org"}),
+    (
+        "OPTIONS",
+        {
+            "origin": "https://example.org",
+            "access-control-request-method": "POST",
+            "access-control-request-headers": "X-Token, Content-Type",
+        },
+    ),
+    (
+        "OPTIONS",
+        {
+            "origin": "https://other.org",
+            "access-control-request-method": "PUT",
+            "access-control-request-headers": "X-Other",
+        },
+    ),
+]
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+async def test_cors_matches_starlette(options):
+    app = make_app(CORSMiddleware, **options)
+    starlette_app = make_app(StarletteCORSMiddleware, **options)
+
+    async with (
+        AsyncClient(app=app, base_url="http://test") as client,
+        AsyncClient(app=starlette_app, base_url="http://test") as starlette_client,
+    ):
+        for method, headers in REQUESTS:
+            response = await client.request(method, "/", headers=headers)
+            expected = await starlette_client.request(method, "/", headers=headers)
+
+            assert response.status_code == expected.status_code
+            assert response.text == expected.text
+            assert dict(response.headers) == dict(expected.headers)
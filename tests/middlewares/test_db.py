@@ -0,0 +1,97 @@
+import asyncio
+from typing import TYPE_CHECKING, cast
+
+from pytest_mock import MockerFixture
+from sqlalchemy import text
+
+from main import config, db
+from main.libs.deadline import Deadline
+from main.middlewares.db import DBSessionMiddleware, DisconnectWatcher
+
+if TYPE_CHECKING:
+    from asgiref.typing import HTTPScope
+
+
+async def test_disconnect_watcher():
+    disconnected = asyncio.Event()
+    messages = [
+        {"type": "http.request", "body": b"a", "more_body": True},
+        {"type": "http.request", "body": b"b", "more_body": False},
+    ]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    deadline = Deadline()
+    watcher = DisconnectWatcher(receive, deadline)
+
+    # The body is passed through to the application, before and after the start
+    assert await watcher.receive() == {
+        "type": "http.request",
+        "body": b"a",
+        "more_body": True,
+    }
+    watcher.start()
+    assert await watcher.receive() == {
+        "type": "http.request",
+        "body": b"b",
+        "more_body": False,
+    }
+
+    # The client disconnects while the application is not reading
+    disconnected.set()
+    await asyncio.sleep(0)
+    assert deadline.cancelled
+
+    assert (await watcher.receive())["type"] == "http.disconnect"
+    assert (await watcher.receive())["type"] == "http.disconnect"
+    watcher.stop()
+
+
+async def test_disconnect_watcher_pass_through():
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    deadline = Deadline()
+    watcher = DisconnectWatcher(receive, deadline)
+
+    # Never started, the disconnection is seen by the application
+    assert (await watcher.receive())["type"] == "http.disconnect"
+    assert deadline.cancelled
+
+    watcher.start()
+    watcher.stop()
+
+
+async def test_db_session_middleware_after_response(mocker: MockerFixture):
+    mocker.patch.object(config, "SQLALCHEMY_CANCEL_ON_DISCONNECT", True)
+    response_complete = asyncio.Event()
+
+    async def receive():
+        # Like uvicorn, the client is reported as disconnected once the response
+        # is complete
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and not message["more_body"]:
+            response_complete.set()
+
+    async def app(scope, receive, send):
+        await db.session.execute(text("SELECT 1"))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        # Like a background task, which runs after the response is sent
+        await asyncio.sleep(0)
+        assert (await db.session.execute(text("SELECT 1"))).scalar_one() == 1
+
+    scope = cast(
+        "HTTPScope",
+        {"type": "http", "method": "GET", "path": "/", "headers": []},
+    )
+    await DBSessionMiddleware(app)(scope, receive, send)
@@ -0,0 +1,106 @@
+import pytest
+from httpx import AsyncClient
+from starlette.responses import PlainTextResponse
+
+from main.middlewares import MiddlewarePipeline, PipelineHook
+
+
+class RecordingHook(PipelineHook):
+    def __init__(self, name: str, calls: list, response=None, fail=False):
+        self.name = name
+        self.calls = calls
+        self.response = response
+        self.fail = fail
+
+    async def on_request(self, context):
+        self.calls.append((self.name, "request"))
+        return self.response
+
+    def on_response_start(self, context, message):
+        self.calls.append((self.name, "response_start"))
+        message["headers"] = [*message["headers"], (b"x-hook", self.name.encode())]
+
+    def on_response_end(self, context):
+        self.calls.append((self.name, "response_end"))
+
+    async def on_finish(self, context):
+        self.calls.append((self.name, "finish", context.exception is not None))
+        if self.fail:
+            raise RuntimeError(self.name)
+
+
+async def app(scope, receive, send):
+    if scope["path"] == "/error":
+        raise ValueError
+
+    await PlainTextResponse("app")(scope, receive, send)
+
+
+async def test_pipeline():
+    calls: list = []
+    pipeline = MiddlewarePipeline(
+        app,
+        [RecordingHook("a", calls), RecordingHook("b", calls)],
+    )
+
+    async with AsyncClient(app=pipeline, base_url="http://test") as client:
+        response = await client.get("/")
+
+    assert response.text == "app"
+    assert response.headers.get_list("x-hook") == ["a", "b"]
+    assert calls == [
+        ("a", "request"),
+        ("b", "request"),
+        ("a", "response_start"),
+        ("b", "response_start"),
+        ("a", "response_end"),
+        ("b", "response_end"),
+        ("b", "finish", False),
+        ("a", "finish", False),
+    ]
+
+
+async def test_pipeline_short_circuit():
+    calls: list = []
+    pipeline = MiddlewarePipeline(
+        app,
+        [
+            RecordingHook("a", calls, response=PlainTextResponse("hook")),
+            RecordingHook("b", calls),
+        ],
+    )
+
+    async with AsyncClient(app=pipeline, base_url="http://test") as client:
+        response = await client.get("/")
+
+    assert response.text == "hook"
+    assert calls == [
+        ("a", "request"),
+        ("a", "response_start"),
+        ("a", "response_end"),
+        ("a", "finish", False),
+    ]
+
+
+async def test_pipeline_errors():
+    calls: list = []
+    pipeline = MiddlewarePipeline(
+        app,
+        [RecordingHook("a", calls), RecordingHook("b", calls, fail=True)],
+    )
+
+    async with AsyncClient(app=pipeline, base_url="http://test") as client:
+        with pytest.raises(RuntimeError):
+            await client.get("/")
+
+    # All the hooks are finished, even after one of them failed
+    assert calls[-2:] == [("b", "finish", False), ("a", "finish", False)]
+
+    calls.clear()
+    pipeline = MiddlewarePipeline(app, [RecordingHook("a", calls)])
+
+    async with AsyncClient(app=pipeline, base_url="http://test") as client:
+        with pytest.raises(ValueError):
+            await client.get("/error")
+
+    assert calls == [("a", "request"), ("a", "finish", True)]
@@ -1,8 +1,20 @@
+import asyncio
 from unittest.mock import AsyncMock, Mock
 
+import pytest
 from pytest_mock import MockerFixture
+from sqlalchemy import create_engine, insert, select
 
-from main import db
+from main import config, db
+from main._db import (
+    ReplicaSelector,
+    RoutingSession,
+    _with_deadline,
+    get_engine_options,
+)
+from main.enums import HealthStatus, ReplicaStrategy
+from main.libs.deadline import DeadlineExceeded, deadline_context
+from main.models.item import ItemModel
 
 
 class CustomException(Exception):
@@ -36,3 +48,168 @@ async def test_db(mocker: MockerFixture):
         pass
 
     assert mock_scoped_session_remove.call_count == 2
+
+
+async def test_db_lazy_scope(mocker: MockerFixture):
+    mock_scoped_session = Mock()
+    mock_scoped_session.remove = AsyncMock()
+    mock_scoped_session.registry.has.return_value = False
+
+    mocker.patch.object(db, "scoped_session", mock_scoped_session)
+
+    # The session is never accessed, so nothing is created nor torn down
+    async with db.scope(lazy=True):
+        assert not mock_scoped_session.called
+
+    assert not mock_scoped_session.remove.called
+
+    # The session is accessed, so it is cleaned up when the scope ends
+    async with db.scope(lazy=True):
+        mock_scoped_session.registry.has.return_value = True
+        assert db.session is mock_scoped_session.return_value
+
+    assert mock_scoped_session.call_count == 1
+    assert mock_scoped_session.remove.call_count == 1
+
+
+def test_routing_session():
+    primary = create_engine("sqlite://")
+    replicas = [create_engine("sqlite://"), create_engine("sqlite://")]
+    selector = ReplicaSelector(replicas, ReplicaStrategy.ROUND_ROBIN)
+    read = select(ItemModel)
+
+    session = RoutingSession(primary=primary, replica_selector=selector)
+    other_session = RoutingSession(primary=primary, replica_selector=selector)
+
+    # Sessions stick to a replica, chosen by round-robin
+    assert session.get_bind(clause=read) is replicas[0]
+    assert other_session.get_bind(clause=read) is replicas[1]
+    assert session.get_bind(clause=read) is replicas[0]
+
+    # Once the session writes, it reads its own writes from the primary
+    assert session.get_bind(clause=insert(ItemModel)) is primary
+    assert session.get_bind(clause=read) is primary
+
+    assert other_session.get_bind(clause=read.with_for_update()) is primary
+    assert other_session.get_bind(clause=read) is primary
+
+
+async def test_use_primary():
+    async with db.scope(lazy=True):
+        # The session of a lazy scope is not created
+        assert not db.uses_primary
+        assert not db.scoped_session.registry.has()
+
+        db.use_primary()
+        assert db.uses_primary
+
+    assert not db.uses_primary
+
+    primary = create_engine("sqlite://")
+    replicas = [create_engine("sqlite://")]
+    selector = ReplicaSelector(replicas, ReplicaStrategy.ROUND_ROBIN)
+    session = RoutingSession(primary=primary, replica_selector=selector)
+
+    session.info[RoutingSession.USE_PRIMARY] = True
+    assert session.get_bind(clause=select(ItemModel)) is primary
+
+
+async def test_in_transaction():
+    async with db.scope(lazy=True):
+        # The session of a lazy scope is not created
+        assert not db.in_transaction
+        assert not db.scoped_session.registry.has()
+
+        db.session.add(ItemModel(data={}))
+        assert db.in_transaction
+
+        await db.session.flush()
+        db.session.expunge_all()
+        assert db.in_transaction
+
+    assert not db.in_transaction
+
+
+def test_replica_selector_least_connections(mocker: MockerFixture):
+    replicas = [create_engine("sqlite://"), create_engine("sqlite://")]
+    selector = ReplicaSelector(replicas, ReplicaStrategy.LEAST_CONNECTIONS)
+
+    mocker.patch(
+        "main._db._count_checked_out_connections",
+        side_effect=lambda engine: 5 if engine is replicas[0] else 2,
+    )
+
+    assert selector() is replicas[1]
+
+
+def test_get_engine_options():
+    options = get_engine_options("mysql+aiomysql://root@127.0.0.1/test")
+    assert options["pool_size"] == config.SQLALCHEMY_POOL_SIZE
+    assert options["max_overflow"] == config.SQLALCHEMY_MAX_OVERFLOW
+    assert options["pool_pre_ping"] is False
+
+    # The in-memory SQLite database uses a static pool, which cannot be sized
+    options = get_engine_options("sqlite+aiosqlite://")
+    assert "pool_size" not in options
+
+
+async def test_warm_up():
+    await db.warm_up()
+
+    pool = db.engine.pool
+    assert pool.checkedin() == config.SQLALCHEMY_POOL_SIZE  # type: ignore[attr-defined]
+
+    await db.check_connections()
+
+
+async def test_pool_checkout_timing(mocker: MockerFixture):
+    mock_observe = mocker.patch.object(db._pool_checkout_duration, "observe")
+
+    # Disposing the engine replaces its pool
+    await db.engine.dispose()
+    async with db.engine.connect():
+        assert db.pending_pool_checkouts == 0
+
+    mock_observe.assert_called_once()
+
+
+async def test_get_health(mocker: MockerFixture):
+    assert await db.get_health() == HealthStatus.HEALTHY
+
+    mocker.patch.object(db, "get_pool_saturation", return_value=1)
+    mock_check_connections = mocker.patch.object(db, "check_connections")
+    assert await db.get_health() == HealthStatus.OVERLOADED
+    # No connection is left to check
+    assert not mock_check_connections.called
+
+
+async def test_deadline():
+    async with db.scope(lazy=True, timeout=5):
+        deadline = deadline_context.get()
+        assert deadline is not None
+
+        async with db.deadline(1):
+            assert (deadline.remaining() or 0) <= 1
+            assert await db.session.scalar(select(1)) == 1
+
+        deadline.cancel()
+        with pytest.raises(DeadlineExceeded):
+            await db.session.scalar(select(1))
+
+    assert deadline_context.get() is None
+
+    # Without a scope deadline, the block gets its own
+    async with db.deadline(1):
+        deadline = deadline_context.get()
+        assert deadline is not None
+        assert (deadline.remaining() or 0) <= 1
+
+
+async def test_with_deadline():
+    @_with_deadline
+    async def statement():
+        await asyncio.sleep(1)
+
+    async with db.deadline(0.01):
+        with pytest.raises(DeadlineExceeded):
+            await statement()
@@ -0,0 +1,116 @@
+from typing import cast
+from unittest.mock import Mock
+
+from pytest_mock import MockerFixture
+
+from main import config
+from main.server import WorkerSupervisor, get_server_config
+
+
+def test_get_server_config(mocker: MockerFixture):
+    mocker.patch.object(config, "SERVER_WORKERS", None)
+    mocker.patch("os.cpu_count", return_value=3)
+    mocker.patch.object(config, "SERVER_MAX_REQUESTS", 1_000)
+
+    server_config = get_server_config()
+    assert server_config.workers == 3
+    assert server_config.limit_max_requests == 1_000
+    assert server_config.access_log is False
+
+
+def test_worker_supervisor_replaces_exited_workers(mocker: MockerFixture):
+    spawn_process = mocker.patch(
+        "main.server._spawn.Process",
+        side_effect=lambda **_: Mock(),
+    )
+    server_config = Mock(workers=2, limit_max_requests=100)
+    mocker.patch("uvicorn.Server")
+    mocker.patch("signal.signal")
+
+    supervisor = WorkerSupervisor(server_config, max_requests_jitter=10)
+    supervisor.startup()
+    assert spawn_process.call_count == 2
+    # The jitter is applied to a copy of the config, per worker
+    for call in spawn_process.call_args_list:
+        max_requests = call.kwargs["kwargs"]["server_config"].limit_max_requests
+        assert 100 <= max_requests <= 110
+    assert server_config.limit_max_requests == 100
+
+    alive, exited = cast(list[Mock], supervisor.processes)
+    alive.is_alive.return_value = True
+    exited.is_alive.return_value = False
+    exited.exitcode = 0
+
+    # A worker exiting cleanly after its max requests is replaced immediately
+    supervisor.replace_exited_workers()
+    assert spawn_process.call_count == 3
+    assert supervisor.processes[0] is alive
+    exited.join.assert_called_once()
+
+
+def test_worker_supervisor_backs_off_crashed_workers(mocker: MockerFixture):
+    spawn_process = mocker.patch(
+        "main.server._spawn.Process",
+        side_effect=lambda **_: Mock(**{"is_alive.return_value": True}),
+    )
+    monotonic = mocker.patch("main.server.time.monotonic", return_value=0.0)
+    mocker.patch("uvicorn.Server")
+    mocker.patch("signal.signal")
+
+    supervisor = WorkerSupervisor(
+        Mock(workers=1, limit_max_requests=None),
+        max_restarts=2,
+    )
+    supervisor.startup()
+
+    def crash():
+        process = cast(Mock, supervisor.processes[0])
+        process.is_alive.return_value = False
+        process.exitcode = 3
+
+    # Replaced after 0.5 seconds, then 1 second
+    for backoff in (0.5, 1.0):
+        crash()
+        calls = spawn_process.call_count
+        supervisor.replace_exited_workers()
+        assert spawn_process.call_count == calls
+
+        monotonic.return_value += backoff
+        supervisor.replace_exited_workers()
+        assert spawn_process.call_count == calls + 1
+
+    # Stopped once it crashed more than max_restarts times in a row
+    crash()
+    supervisor.replace_exited_workers()
+    assert spawn_process.call_count == 3
+    assert supervisor.should_exit.is_set()
+    assert supervisor.failed
+
+
+def test_worker_supervisor_resets_crashes(mocker: MockerFixture):
+    mocker.patch(
+        "main.server._spawn.Process",
+        side_effect=lambda **_: Mock(**{"is_alive.return_value": True}),
+    )
+    monotonic = mocker.patch("main.server.time.monotonic", return_value=0.0)
+    mocker.patch("uvicorn.Server")
+    mocker.patch("signal.signal")
+
+    supervisor = WorkerSupervisor(
+        Mock(workers=1, limit_max_requests=None),
+        max_restarts=1,
+    )
+    supervisor.startup()
+
+    # A worker crashing after running for a while is not crash looping
+    for _ in range(3):
+        monotonic.return_value += 60
+        process = cast(Mock, supervisor.processes[0])
+        process.is_alive.return_value = False
+        process.exitcode = 1
+        supervisor.replace_exited_workers()
+        monotonic.return_value += 0.5
+        supervisor.replace_exited_workers()
+        assert supervisor.processes[0] is not process
+
+    assert not supervisor.failed
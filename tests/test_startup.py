@@ -0,0 +1,15 @@
+from main.profiling import profile_startup
+
+# Seconds to import the application, its dependencies included. This leaves room
+# for slower machines, a regression is expected to exceed it by far.
+COLD_START_BUDGET = 3
+
+
+def test_cold_start():
+    profile = profile_startup()
+
+    assert profile.phases["dependencies"] + profile.phases["application"] < (
+        COLD_START_BUDGET
+    )
+    assert not profile.engine_created_on_import
+    assert profile.imports[0].module == "main"